@@ -1,34 +1,106 @@
-from traceback import print_exc
+import sys
+from argparse import ArgumentParser
+from typing import Optional
 
 from .ais_message import AISMessage
-from .nmea_message import NMEAMessage
+from .errors import DECODE_FAILED, InvalidLines
+from .metrics import Metrics
+from .nmea_message import POLICIES, STRICT, NMEAMessage
+from .parallel import decode_file
+from .pipeline import BLOCK, OVERFLOW_POLICIES, Pipeline
 from .stream import Stream
 
 
-def decode(nmea: NMEAMessage):
+def decode(nmea: NMEAMessage, metrics: Optional[Metrics] = None, errors: Optional[InvalidLines] = None):
+    """
+    Print one message. Messages that fail to decode raise a ValueError, or
+    are recorded in errors if given.
+    """
     if AISMessage.is_ais(nmea):
         try:
-            ais = AISMessage(nmea)
-            print(ais)
+            ais = AISMessage(nmea) if metrics is None else metrics.decode(nmea)
         except Exception as e:
-            raise ValueError(f'Failed to decode AIS message "{nmea}"') from e
+            if errors is None:
+                raise ValueError(f'Failed to decode AIS message "{nmea}"') from e
+            errors.add(nmea.raw, e, DECODE_FAILED)
+            return
+        print(ais)
     else:
         print(f'Unsupported encoding for {nmea}')
 
 
-def main():
-    with Stream() as s:
-        messages = iter(s)
-        while True:
-            try:
-                decode(next(messages))
-            except StopIteration:
-                messages = iter(s)
-            except Exception:
-                print_exc()
+def main(metrics: Optional[Metrics] = None, policy: str = STRICT):
+    # Invalid lines and messages are counted rather than raised, so that
+    # the stream is read without interruption
+    errors = InvalidLines()
+    try:
+        with Stream(metrics=metrics, policy=policy, errors=errors) as s:
+            for msg in s:
+                decode(msg, metrics, errors)
+    finally:
+        if errors.counts:
+            print(f'Invalid lines by reason: {dict(errors.counts)}', file=sys.stderr)
 
 
-try:
-    main()
-except KeyboardInterrupt:
-    pass
+def main_pipeline(
+    workers: int, overflow: str = BLOCK, metrics: Optional[Metrics] = None, policy: str = STRICT,
+):
+    # Messages are received and decoded in background threads, so printing
+    # never holds up reading the socket
+    with Pipeline(workers=workers, overflow=overflow, policy=policy, metrics=metrics) as p:
+        try:
+            for msg in p:
+                print(msg if isinstance(msg, AISMessage) else f'Unsupported encoding for {msg}')
+        finally:
+            if p.errors.counts:
+                print(f'Invalid lines by reason: {dict(p.errors.counts)}', file=sys.stderr)
+            if p.dropped_lines:
+                print(f'Lines dropped for a slow consumer: {p.dropped_lines}', file=sys.stderr)
+
+
+def main_file(path: str, jobs: int, ordered: bool, policy: str = STRICT):
+    errors = InvalidLines()
+    try:
+        for line in decode_file(path, workers=jobs, ordered=ordered, func=str, errors=errors, policy=policy):
+            print(line)
+    finally:
+        if errors.counts:
+            print(f'Invalid lines by reason: {dict(errors.counts)}', file=sys.stderr)
+
+
+def parse_args():
+    parser = ArgumentParser(prog='pyais', description='Decode AIS messages')
+    parser.add_argument('-f', '--file', help='decode a log file instead of the network stream')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes for --file; defaults to the CPU count')
+    parser.add_argument('--unordered', action='store_true',
+                        help='with --file, print messages as workers finish instead of in file order')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve stream metrics on this local port, at /metrics and /metrics.json')
+    parser.add_argument('--policy', choices=POLICIES, default=STRICT,
+                        help='validation of every sentence: strict checks the channel and sequence IDs, '
+                             'lenient does not, and checksum-off skips the checksum as well')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='decode the network stream in this many background threads, '
+                             'with a separate thread receiving')
+    parser.add_argument('--overflow', choices=OVERFLOW_POLICIES, default=BLOCK,
+                        help='with --workers, whether receiving waits for the workers or drops the oldest '
+                             'lines when they fall behind')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    try:
+        metrics = None
+        if args.metrics_port and not args.file:
+            metrics = Metrics()
+            metrics.serve(args.metrics_port)
+
+        if args.file:
+            main_file(args.file, args.jobs, not args.unordered, args.policy)
+        elif args.workers:
+            main_pipeline(args.workers, args.overflow, metrics, args.policy)
+        else:
+            main(metrics, args.policy)
+    except KeyboardInterrupt:
+        pass
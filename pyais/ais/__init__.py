@@ -0,0 +1,112 @@
+"""
+Decoders for the AIS message types, keyed by message type number.
+
+The registry is built once at import time; register() replaces or adds the
+decoder for a message type, e.g. for types that pyais does not decode yet.
+
+DECODERS hold the decoders of the cooked profile. Those of the raw profile,
+which leave values as transmitted, are compiled from the field tables on
+first use by raw_decoder().
+"""
+
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from . import (
+    aid_to_nav,
+    base_station,
+    binary_broadcast,
+    pos_class_a1,
+    pos_class_a2,
+    pos_class_a3,
+    pos_class_b,
+    pos_class_b_ext,
+    static,
+    static_and_voyage,
+)
+from ..bits import Bits
+from ..schema import COOKED, RAW, Field, compile_decoder, compile_getters
+
+Decoder = Callable[[Bits, Optional[float]], dict]
+
+# Message type -> decoder
+DECODERS: Dict[int, Decoder] = {
+    1: pos_class_a1.decode,
+    2: pos_class_a2.decode,
+    3: pos_class_a3.decode,
+    4: base_station.decode,
+    5: static_and_voyage.decode,
+    8: binary_broadcast.decode,
+    18: pos_class_b.decode,
+    19: pos_class_b_ext.decode,
+    21: aid_to_nav.decode,
+    24: static.decode,
+}
+
+# Message type -> field table, for the types that have a single one
+FIELDS: Dict[int, Sequence[Field]] = {
+    1: pos_class_a1.FIELDS,
+    2: pos_class_a1.FIELDS,
+    3: pos_class_a1.FIELDS,
+    4: base_station.FIELDS,
+    5: static_and_voyage.FIELDS,
+    8: binary_broadcast.FIELDS,
+    18: pos_class_b.FIELDS,
+    19: pos_class_b_ext.FIELDS,
+    21: aid_to_nav.FIELDS,
+}
+
+# Message type -> decoder of the raw profile, compiled on first use
+_raw: Dict[int, Decoder] = {}
+
+# (message type, profile) -> per-field getters for lazy decoding, compiled on
+# first use
+_getters: Dict[Tuple[int, str], Dict[str, Callable]] = {}
+
+
+def register(msg_type: int, decoder: Decoder, fields: Optional[Sequence[Field]] = None):
+    """
+    Register the decoder for a message type, replacing any existing one.
+
+    :param fields: The field table of the decoder, if it has one; this
+                   enables lazy decoding for the type.
+    """
+    msg_type = int(msg_type)
+    if not 1 <= msg_type <= 27:  # The types of ais_message.AISType
+        raise ValueError(f'Invalid message type {msg_type}')
+    DECODERS[msg_type] = decoder
+    if fields is None:
+        FIELDS.pop(msg_type, None)
+    else:
+        FIELDS[msg_type] = fields
+    _raw.pop(msg_type, None)
+    for profile in (COOKED, RAW):
+        _getters.pop((msg_type, profile), None)
+
+
+def raw_decoder(msg_type: int) -> Optional[Decoder]:
+    """
+    The decoder of the raw profile of a message type, or None if it has no
+    field table.
+    """
+    result = _raw.get(msg_type)
+    if result is None:
+        if msg_type == 24 and DECODERS.get(24) is static.decode:
+            result = static.decode_raw
+        else:
+            fields = FIELDS.get(msg_type)
+            if fields is None:
+                return None
+            result = compile_decoder(fields, profile=RAW)
+        _raw[msg_type] = result
+    return result
+
+
+def getters(msg_type: int, profile: str = COOKED) -> Optional[Dict[str, Callable]]:
+    """The lazy field getters of a message type, or None if it has no field table."""
+    result = _getters.get((msg_type, profile))
+    if result is None:
+        fields = FIELDS.get(msg_type)
+        if fields is None:
+            return None
+        result = _getters[msg_type, profile] = compile_getters(fields, profile)
+    return result
@@ -0,0 +1,34 @@
+from typing import Callable, Optional
+
+from .pos_class_a1 import decode_lat, decode_long, decode_time
+from ..bits import Bits
+from ..schema import Field, compile_decoder, text
+
+
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_21_aid_to_navigation_report
+
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field('aid_type', 5),
+    Field('name', 120, convert=text),
+    Field('accuracy_sub_10m', 1, convert=bool),
+    Field('long_deg', 28, signed=True, convert=decode_long),
+    Field('lat_deg', 27, signed=True, convert=decode_lat),
+    Field('to_bow', 9),
+    Field('to_stern', 9),
+    Field('to_port', 6),
+    Field('to_starboard', 6),
+    Field('epfd', 4),
+    Field(('time_mode', 'time'), 6, convert=decode_time),
+    Field('off_position', 1, convert=bool),
+    Field('regional', 8),
+    Field('raim_in_use', 1, convert=bool),
+    Field('virtual_aid', 1, convert=bool),
+    Field('assigned', 1, convert=bool),
+    Field(None, 1),  # spare
+    Field('name_ext', None, convert=text),
+)
+
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS)
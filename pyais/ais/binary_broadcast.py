@@ -1,22 +1,20 @@
+from typing import Callable, Optional
+
 from ..bits import Bits
+from ..schema import Field, compile_decoder, raw
 
 
-def decode(bits: Bits) -> dict:
-    return {}
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_8_binary_broadcast_message
+# TODO: data needs to be interpreted depending DAC-FID
 
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field(None, 2),  # spare
+    Field('dac', 10),
+    Field('fid', 6),
+    Field('data', None, convert=raw),
+)
 
-'''
-def decode_msg_8(bit_vector):
-    """
-    Binary Broadcast Message
-    TODO: data needs to be interpreted depending DAC-FID
-    """
-    return {
-        'type': to_int(bit_vector[0:6], 2),
-        'repeat': to_int(bit_vector[6:8], 2),
-        'mmsi': to_int(bit_vector[8:38], 2),
-        'dac': to_int(bit_vector[40:50], 2),
-        'fid': to_int(bit_vector[50:56], 2),
-        'data': to_int(bit_vector[56::], 2),
-    }
-'''
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS)
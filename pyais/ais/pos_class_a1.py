@@ -1,6 +1,12 @@
 from datetime import datetime, timedelta
 from enum import Enum
+from time import time
+from typing import Callable, Optional
+
 from ..bits import Bits
+from ..schema import Field, compile_decoder, raw, raw_name, uses_ref_time
+
+EPOCH = datetime(1970, 1, 1)
 
 
 # https://www.navcen.uscg.gov/?pageName=AISMessagesA
@@ -33,6 +39,10 @@ class TimeMode(Enum):
     INOPERATIVE  = 63
 
 
+# Time stamp value -> TimeMode, for values of 60 and above
+_TIME_MODES = (None,) * 60 + tuple(TimeMode(second) for second in range(60, 64))
+
+
 class SpecialManoeuvreStatus(Enum):
     UNAVAILABLE = 0
     NOT_ENGAGED = 1
@@ -46,6 +56,7 @@ class SyncState(Enum):
     BASE_INDIRECT = 3
 
 
+@raw_name('turn')
 def decode_turn(turn: int) -> (bool, float, float):
     # turn_indicate_avail, turn_min_dps, turn_max_dps
     if turn == -128:
@@ -74,6 +85,22 @@ def decode_pos(pos: int, undef: int) -> float:
     return degrees
 
 
+@raw_name('lon')
+def decode_long(pos: int) -> float:
+    return decode_pos(pos, 181)
+
+
+@raw_name('lat')
+def decode_lat(pos: int) -> float:
+    return decode_pos(pos, 91)
+
+
+@raw_name('speed')
+def decode_speed(speed: int) -> float:
+    return speed / 10
+
+
+@raw_name('course')
 def decode_course(course: int) -> float:
     if course == 3600:
         return None
@@ -81,6 +108,7 @@ def decode_course(course: int) -> float:
     return course / 10
 
 
+@raw_name('heading')
 def decode_heading(head: int) -> float:
     if head == 511:
         return None
@@ -88,58 +116,50 @@ def decode_heading(head: int) -> float:
     return head
 
 
-def decode_time(second: int) -> (TimeMode, datetime):
+@uses_ref_time
+@raw_name('second')
+def decode_time(second: int, ref_time: Optional[float] = None) -> (TimeMode, datetime):
+    """
+    The report only holds the UTC second; the full time is taken as the one
+    with that second closest to ref_time, in epoch seconds, e.g. the receiver
+    time logged with the sentence. Without one, the system clock is used.
+    """
     if second >= 60:
-        return TimeMode(second), None
-
-    # Let's hope that your clock is synchronized
-    now = datetime.utcnow()
-    subst = now.replace(second=second, microsecond=0)
-    delta = (subst - now).total_seconds()
+        return _TIME_MODES[second], None
+
+    if ref_time is None:
+        # Let's hope that your clock is synchronized
+        ref_time = time()
+    ref = int(ref_time)
+    stamp = ref - ref % 60 + second
+    delta = stamp - ref_time
     if delta > 30:
-        subst -= timedelta(minutes=1)
+        stamp -= 60
     elif delta < -30:
-        subst += timedelta(minutes=1)
-    return TimeMode.EPFS, subst
-
-
-def decode(bits: Bits) -> dict:
-    d = {
-        'repeat': bits.uint(2),
-        'mmsi': bits.uint(30),
-        'status': NavigationStatus(bits.uint(4)),
-    }
-
-    turn = bits.int(8)
-    ti_avail, turn_min, turn_max = decode_turn(turn)
-
-    d.update({
-        'turn_indicate_avail': ti_avail,
-        'turn_min_dps': turn_min,
-        'turn_max_dps': turn_max,
-
-        'speed_knots': bits.uint(10)/10,
-        'accuracy_sub_10m': bits.bool(),
-        'long_deg': decode_pos(bits.int(28), 181),
-        'lat_deg': decode_pos(bits.int(27), 91),
-        'course_deg': decode_course(bits.uint(12)),
-        'heading_deg': decode_heading(bits.uint(9)),
-    })
-
-    time_mode, timestamp = decode_time(bits.uint(6))
-
-    d.update({
-        'time_mode': time_mode,
-        'time': timestamp,
-        'special_manoeuvre': SpecialManoeuvreStatus(bits.uint(2)),
-        'spare': bits.raw(3),
-        'raim_in_use': bits.bool(),
-
-        'sync': SyncState(bits.uint(2)),
-        'slot_timeout': bits.uint(3),
-        # Described in https://www.itu.int/dms_pubrec/itu-r/rec/m/R-REC-M.1371-5-201402-I!!PDF-E.pdf ?
-        'comm_state': bits.raw(14)
-    })
-
-    bits.end()
-    return d
+        stamp += 60
+    return TimeMode.EPFS, EPOCH + timedelta(seconds=stamp)
+
+
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field('status', 4, convert=NavigationStatus),
+    Field(('turn_indicate_avail', 'turn_min_dps', 'turn_max_dps'), 8, signed=True, convert=decode_turn),
+    Field('speed_knots', 10, convert=decode_speed),
+    Field('accuracy_sub_10m', 1, convert=bool),
+    Field('long_deg', 28, signed=True, convert=decode_long),
+    Field('lat_deg', 27, signed=True, convert=decode_lat),
+    Field('course_deg', 12, convert=decode_course),
+    Field('heading_deg', 9, convert=decode_heading),
+    Field(('time_mode', 'time'), 6, convert=decode_time),
+    Field('special_manoeuvre', 2, convert=SpecialManoeuvreStatus),
+    Field('spare', 3, convert=raw),
+    Field('raim_in_use', 1, convert=bool),
+    Field('sync', 2, convert=SyncState),
+    Field('slot_timeout', 3),
+    # Described in https://www.itu.int/dms_pubrec/itu-r/rec/m/R-REC-M.1371-5-201402-I!!PDF-E.pdf ?
+    Field('comm_state', 14, convert=raw),
+)
+
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS, exact=True)
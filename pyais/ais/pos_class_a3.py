@@ -1,6 +1,8 @@
+from typing import Optional
+
 from . import pos_class_a1
 from ..bits import Bits
 
 
-def decode(bits: Bits) -> dict:
-    return pos_class_a1.decode(bits)
+def decode(bits: Bits, ref_time: Optional[float] = None) -> dict:
+    return pos_class_a1.decode(bits, ref_time)
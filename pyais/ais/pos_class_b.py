@@ -1,35 +1,33 @@
+from typing import Callable, Optional
+
+from .pos_class_a1 import decode_course, decode_heading, decode_lat, decode_long, decode_speed, decode_time
 from ..bits import Bits
+from ..schema import Field, compile_decoder, raw
 
 
-def decode(bits: Bits) -> dict:
-    return {}
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_18_standard_class_b_cs_position_report
 
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field(None, 8),  # reserved
+    Field('speed_knots', 10, convert=decode_speed),
+    Field('accuracy_sub_10m', 1, convert=bool),
+    Field('long_deg', 28, signed=True, convert=decode_long),
+    Field('lat_deg', 27, signed=True, convert=decode_lat),
+    Field('course_deg', 12, convert=decode_course),
+    Field('heading_deg', 9, convert=decode_heading),
+    Field(('time_mode', 'time'), 6, convert=decode_time),
+    Field('regional', 2),
+    Field('cs_unit', 1, convert=bool),
+    Field('display', 1, convert=bool),
+    Field('dsc', 1, convert=bool),
+    Field('band', 1, convert=bool),
+    Field('msg22', 1, convert=bool),
+    Field('assigned', 1, convert=bool),
+    Field('raim_in_use', 1, convert=bool),
+    Field('radio', 20, convert=raw),
+)
 
-'''
-def decode_msg_18(bit_vector):
-    """
-    Standard Class B CS Position Report
-    Src: https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_18_standard_class_b_cs_position_report
-    """
-    return {
-        'type': to_int(bit_vector[0:6], 2),
-        'repeat': to_int(bit_vector[6:8], 2),
-        'mmsi': to_int(bit_vector[8:38], 2),
-        'speed': to_int(bit_vector[46:55], 2),
-        'accuracy': bool(to_int(bit_vector[55], 2)),
-        'lon': signed(bit_vector[56:85]) / 600000.0,
-        'lat': signed(bit_vector[85:112]) / 600000.0,
-        'course': to_int(bit_vector[112:124], 2) * 0.1,
-        'heading': to_int(bit_vector[124:133], 2),
-        'second': to_int(bit_vector[133:139], 2),
-        'regional': to_int(bit_vector[139:141], 2),
-        'cs': bool(to_int(bit_vector[141])),
-        'display': bool(to_int(bit_vector[142])),
-        'dsc': bool(to_int(bit_vector[143])),
-        'band': bool(to_int(bit_vector[144])),
-        'msg22': bool(to_int(bit_vector[145])),
-        'assigned': bool(to_int(bit_vector[146])),
-        'raim': bool(to_int(bit_vector[147])),
-        'radio': to_int(bit_vector[148::]),
-    }
-'''
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS)
@@ -0,0 +1,36 @@
+from typing import Callable, Optional
+
+from .pos_class_a1 import decode_course, decode_heading, decode_lat, decode_long, decode_speed, decode_time
+from ..bits import Bits
+from ..schema import Field, compile_decoder, text
+
+
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_19_extended_class_b_cs_position_report
+
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field(None, 8),  # reserved
+    Field('speed_knots', 10, convert=decode_speed),
+    Field('accuracy_sub_10m', 1, convert=bool),
+    Field('long_deg', 28, signed=True, convert=decode_long),
+    Field('lat_deg', 27, signed=True, convert=decode_lat),
+    Field('course_deg', 12, convert=decode_course),
+    Field('heading_deg', 9, convert=decode_heading),
+    Field(('time_mode', 'time'), 6, convert=decode_time),
+    Field('regional', 4),
+    Field('shipname', 120, convert=text),
+    Field('ship_type', 8),
+    Field('to_bow', 9),
+    Field('to_stern', 9),
+    Field('to_port', 6),
+    Field('to_starboard', 6),
+    Field('epfd', 4),
+    Field('raim_in_use', 1, convert=bool),
+    Field('dte', 1, convert=bool),
+    Field('assigned', 1, convert=bool),
+    Field(None, 4),  # spare
+)
+
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS)
@@ -0,0 +1,56 @@
+from typing import Callable, Optional
+
+from ..bits import Bits
+from ..schema import RAW, Field, compile_decoder, text
+
+
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_24_static_data_report
+# Part A and part B share a header and are told apart by the part number.
+
+HEADER = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field('part_num', 2),
+)
+
+FIELDS_A = HEADER + (
+    Field('shipname', 120, convert=text),
+)
+
+FIELDS_B = HEADER + (
+    Field('ship_type', 8),
+    Field('vendor_id', 18, convert=text),
+    Field('model', 4),
+    Field('serial', 20),
+    Field('callsign', 42, convert=text),
+    # For auxiliary craft these 30 bits hold the mothership MMSI instead
+    Field('to_bow', 9),
+    Field('to_stern', 9),
+    Field('to_port', 6),
+    Field('to_starboard', 6),
+    Field(None, 6),  # spare
+)
+
+decode_a: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS_A, name='decode_a')
+decode_b: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS_B, name='decode_b')
+decode_raw_a: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS_A, name='decode_raw_a', profile=RAW)
+decode_raw_b: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS_B, name='decode_raw_b', profile=RAW)
+
+
+def decode(bits: Bits, ref_time: Optional[float] = None) -> dict:
+    part_num = bits.uint_at(38, 2)
+    if part_num == 0:
+        return decode_a(bits, ref_time)
+    if part_num == 1:
+        return decode_b(bits, ref_time)
+    raise ValueError(f'Invalid type 24 part number {part_num}')
+
+
+def decode_raw(bits: Bits, ref_time: Optional[float] = None) -> dict:
+    part_num = bits.uint_at(38, 2)
+    if part_num == 0:
+        return decode_raw_a(bits, ref_time)
+    if part_num == 1:
+        return decode_raw_b(bits, ref_time)
+    raise ValueError(f'Invalid type 24 part number {part_num}')
@@ -1,33 +1,38 @@
+from typing import Callable, Optional
+
 from ..bits import Bits
+from ..schema import Field, compile_decoder, raw_name, text
+
+
+# https://gpsd.gitlab.io/gpsd/AIVDM.html#_type_5_static_and_voyage_related_data
 
+@raw_name('draught')
+def decode_draught(draught: int) -> float:
+    return draught / 10
 
-def decode(bits: Bits) -> dict:
-    return {}
 
+FIELDS = (
+    Field(None, 6),  # message type
+    Field('repeat', 2),
+    Field('mmsi', 30),
+    Field('ais_version', 2),
+    Field('imo', 30),
+    Field('callsign', 42, convert=text),
+    Field('shipname', 120, convert=text),
+    Field('ship_type', 8),
+    Field('to_bow', 9),
+    Field('to_stern', 9),
+    Field('to_port', 6),
+    Field('to_starboard', 6),
+    Field('epfd', 4),
+    Field('eta_month', 4),
+    Field('eta_day', 5),
+    Field('eta_hour', 5),
+    Field('eta_minute', 6),
+    Field('draught_m', 8, convert=decode_draught),
+    Field('destination', 120, convert=text),
+    Field('dte', 1, convert=bool),
+    Field(None, 1),  # spare
+)
 
-'''
-def decode_msg_5(bit_vector):
-    epfd = to_int(bit_vector[270:274], 2)
-    ship_type = to_int(bit_vector[66:72], 2)
-    return {
-        'type': to_int(bit_vector[0:6], 2),
-        'repeat': to_int(bit_vector[6:8], 2),
-        'mmsi': to_int(bit_vector[8:38], 2),
-        'ais_version': to_int(bit_vector[38:40], 2),
-        'imo': to_int(bit_vector[40:70], 2),
-        'callsign': bin_to_ascii6(bit_vector[70:112]),
-        'shipname': bin_to_ascii6(bit_vector[112:232]),
-        'shiptype': (ship_type, SHIP_TYPE.get(ship_type, NULL)),
-        'to_bow': to_int(bit_vector[240:249], 2),
-        'to_stern': to_int(bit_vector[249:258], 2),
-        'to_port': to_int(bit_vector[258:264], 2),
-        'to_starboard': to_int(bit_vector[264:270], 2),
-        'epfd': (epfd, EPFD_TYPE.get(epfd, NULL)),
-        'month': to_int(bit_vector[274:278], 2),
-        'day': to_int(bit_vector[278:283], 2),
-        'hour': to_int(bit_vector[283:288], 2),
-        'minute': to_int(bit_vector[288:294], 2),
-        'draught': to_int(bit_vector[294:302], 2) / 10.0,
-        'destination': bin_to_ascii6(bit_vector[302::])
-    }
-'''
+decode: Callable[[Bits, Optional[float]], dict] = compile_decoder(FIELDS)
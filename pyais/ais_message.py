@@ -1,7 +1,10 @@
 from enum import Enum
-from importlib import import_module
 from pprint import pformat
+from typing import Optional
+
+from . import ais, records
 from .nmea_message import NMEAMessage, NMEAType
+from .schema import COOKED, RAW, LazyFields
 
 
 class AISGroup(Enum):
@@ -74,6 +77,11 @@ class AISType(Enum):
     LONG_RANGE_BROADCAST = 27
 
 
+# Lookups that avoid constructing the enums by value for every message
+AIS_GROUPS = {group.value: group for group in AISGroup}
+AIS_TYPES = (None,) + tuple(AISType) + (None,) * (64 - 1 - len(AISType))
+
+
 class AISMessage:
     """
     AIS (Automatic Identification System) message. Refer to
@@ -87,29 +95,82 @@ class AISMessage:
         'attrs',
         'group',
         'msg_type',
+        'static',
     )
 
-    def __init__(self, nmea: NMEAMessage):
+    def __init__(
+        self,
+        nmea: NMEAMessage,
+        lazy: bool = False,
+        ref_time: Optional[float] = None,
+        record: bool = False,
+        keep_nmea: bool = True,
+        profile: str = COOKED,
+    ):
+        """
+        :param lazy: If set, attrs is a mapping that decodes each field when it
+                     is first accessed, instead of a dict of every field.
+        :param record: If set, attrs is the compact record of the message type
+                       (see pyais.records), which reads like a dict by key.
+        :param keep_nmea: If not set, the sentence and its bits are released
+                          after decoding, and nmea is None. Cannot be
+                          combined with lazy.
+        :param profile: COOKED, for enums, floats in natural units, datetimes
+                        and so on, or RAW, for the integers as transmitted
+                        under unit-free keys such as 'lat' and 'speed'. Types
+                        without a field table are always decoded cooked.
+        :param ref_time: Reference time in epoch seconds from which full
+                         timestamps are reconstructed, e.g. the time of a
+                         batch. Defaults to the receiver time logged with the
+                         sentence, if any, or else to the system clock.
+        """
         self.nmea = nmea
         self.ind = 0
         self.attrs = {}
+        # Static data of the vessel, joined on by a StaticCache
+        self.static = None
 
         if not self.is_ais(nmea):
             raise ValueError(f'"{nmea}" is not a supported AIS message')
 
-        self.group = AISGroup(nmea.msg_type)
+        try:
+            self.group = AIS_GROUPS[nmea.msg_type]
+        except KeyError:
+            raise ValueError(f'{nmea.msg_type!r} is not a valid AISGroup') from None
+
         if nmea.nmea_type == NMEAType.ENCAPSULATED and self.group in (
             AISGroup.OWN_VESSEL, AISGroup.OTHER_VESSEL
         ):
-            self.msg_type = AISType(nmea.bits.uint(6))
-            try:
-                mod = import_module('pyais.ais.' + self.msg_type.name.lower())
-                self.attrs = mod.decode(nmea.bits)
-            except ModuleNotFoundError:
-                pass
+            value = nmea.bits.uint_at(0, 6)
+            self.msg_type = AIS_TYPES[value]
+            if self.msg_type is None:
+                raise ValueError(f'{value} is not a valid AISType')
+
+            decoder = ais.DECODERS.get(value)
+            if decoder is not None:
+                if profile == RAW:
+                    decoder = ais.raw_decoder(value) or decoder
+                elif profile != COOKED:
+                    raise ValueError(f'Unknown decode profile "{profile}"')
+                if ref_time is None:
+                    ref_time = nmea.rx_time
+                getters = lazy and ais.getters(value, profile)
+                if getters:
+                    if not keep_nmea:
+                        raise ValueError('Lazy decoding needs the message bits')
+                    self.attrs = LazyFields(nmea.bits, getters, ref_time)
+                elif record:
+                    self.attrs = records.decode_record(nmea.bits, ref_time, profile)
+                    if self.attrs is None:
+                        self.attrs = decoder(nmea.bits, ref_time)
+                else:
+                    self.attrs = decoder(nmea.bits, ref_time)
         else:
             self.msg_type = None
 
+        if not keep_nmea:
+            self.nmea = None
+
     @staticmethod
     def is_ais(nmea: NMEAMessage) -> bool:
         return nmea.talker == 'AI'
@@ -117,4 +178,6 @@ class AISMessage:
     def __str__(self):
         if self.msg_type:
             return f'{self.group.name}/{self.msg_type.name}: {self.attrs}'
+        if self.nmea is None:
+            return f'{self.group.name} unsupported'
         return f'{self.group.name} unsupported: {self.nmea.raw}'
@@ -0,0 +1,198 @@
+"""
+Columnar batch decoding with NumPy.
+
+This module needs numpy, which is otherwise not a dependency of pyais; it is
+listed in requirements-test.txt, so that the tests of this module run.
+
+Payloads of equal length are turned into a 2D array of six-bit values
+through a lookup table, expanded into a 2D bit matrix, and every field of a
+field table is extracted for many payloads at once with a single matrix
+product.
+
+The bit matrix takes a byte per bit, and eight more for its float64 copy
+in the product: about 1.5 KB per 168-bit position report. It is therefore
+built for CHUNK_ROWS payloads at a time, which bounds it to a few
+megabytes whatever the size of the batch. The columns themselves take
+eight bytes per field and payload until converted to their final type.
+"""
+
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from .ais import pos_class_a1
+from .schema import Field
+
+# Character -> six-bit value; 0xFF marks invalid characters
+ASCII6_LUT = np.full(0x100, 0xFF, dtype=np.uint8)
+ASCII6_LUT[0x30:0x58] = np.arange(0x00, 0x28)
+ASCII6_LUT[0x60:0x78] = np.arange(0x28, 0x40)
+
+# Payloads whose bit matrix is built and multiplied at once
+CHUNK_ROWS = 4096
+
+
+def payloads_to_array(payloads: Sequence[str]) -> np.ndarray:
+    """
+    Convert equal-length armored payloads to a (messages, characters) uint8
+    array of six-bit values.
+    """
+    if not payloads:
+        return np.empty((0, 0), dtype=np.uint8)
+    width = len(payloads[0])
+    joined = ''.join(payloads).encode('ascii')
+    if len(joined) != width * len(payloads):
+        raise ValueError('All payloads must have the same length')
+
+    chars = np.frombuffer(joined, dtype=np.uint8).reshape(len(payloads), width)
+    values = ASCII6_LUT[chars]
+    if (values == 0xFF).any():
+        row, col = np.argwhere(values == 0xFF)[0]
+        raise ValueError(f'Invalid data character {chars[row, col]} in payload {row}')
+    return values
+
+
+def array_to_bits(values: np.ndarray) -> np.ndarray:
+    """
+    Expand a (messages, characters) array of six-bit values into a
+    (messages, bits) array of 0/1, most significant bit first.
+    """
+    bits = np.unpackbits(values[:, :, np.newaxis], axis=2)[:, :, 2:]
+    return bits.reshape(values.shape[0], values.shape[1] * 6)
+
+
+def decode_columns(values: np.ndarray, fields: Sequence[Field]) -> Dict[str, np.ndarray]:
+    """
+    Extract the raw integer value of every named fixed-width field in a field
+    table, as one int64 column per field. Converters are not applied; fields
+    with tuple keys are stored under the first key.
+    """
+    n_bits = values.shape[1] * 6
+
+    named = []
+    weights = []
+    offset = 0
+    for field in fields:
+        if field.width is None:
+            raise ValueError('Variable-width fields are not supported')
+        start, offset = offset, offset + field.width
+        if offset > n_bits:
+            raise ValueError(f'Payloads have {n_bits} bits; the table needs {offset}')
+        if field.name is None:
+            continue
+        w = np.zeros(n_bits, dtype=np.int64)
+        w[start:offset] = 1 << np.arange(field.width - 1, -1, -1, dtype=np.int64)
+        named.append(field)
+        weights.append(w)
+
+    # A float64 product goes through BLAS, and is exact for fields of up to
+    # 53 bits
+    dtype = np.int64 if max(f.width for f in named) > 53 else np.float64
+    weights = np.stack(weights, axis=1).astype(dtype)
+    matrix = np.empty((values.shape[0], len(named)), dtype=np.int64)
+    for start in range(0, values.shape[0], CHUNK_ROWS):
+        stop = start + CHUNK_ROWS
+        bits = array_to_bits(values[start:stop]).astype(dtype)
+        matrix[start:stop] = bits @ weights
+
+    columns = {}
+    for i, field in enumerate(named):
+        col = matrix[:, i]
+        if field.signed:
+            col = np.where(col >= 1 << (field.width - 1), col - (1 << field.width), col)
+        key = field.name[0] if isinstance(field.name, tuple) else field.name
+        columns[key] = col
+    return columns
+
+
+def _decode_turn(turn: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+    # Vectorized pos_class_a1.decode_turn, with NaN in place of None
+    sens = np.copysign((turn / 4.733)**2 / 60, turn)
+    avail = (turn > -127) & (turn < 127)
+    turn_min = np.select(
+        (turn == -128, turn == -127, turn == 127),
+        (np.nan, -np.inf, 5/30),
+        sens,
+    )
+    turn_max = np.select(
+        (turn == -128, turn == -127, turn == 127),
+        (np.nan, -5/30, np.inf),
+        sens,
+    )
+    return avail, turn_min, turn_max
+
+
+def _decode_pos(pos: np.ndarray, undef: int) -> np.ndarray:
+    degrees = pos / 10_000 / 60
+    return np.where(degrees == undef, np.nan, degrees)
+
+
+def _decode_time(second: np.ndarray, ref_time: Union[float, np.ndarray]) -> np.ndarray:
+    # Vectorized pos_class_a1.decode_time, as epoch seconds with NaN for None
+    ref_time = np.asarray(ref_time, dtype=np.float64)
+    ref = np.floor(ref_time)
+    stamp = ref - ref % 60 + second
+    delta = stamp - ref_time
+    stamp = np.where(delta > 30, stamp - 60, np.where(delta < -30, stamp + 60, stamp))
+    return np.where(second >= 60, np.nan, stamp)
+
+
+def decode_position_reports(
+    payloads: Sequence[str],
+    ref_time: Optional[Union[float, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Decode type 1, 2 and 3 position reports into columns named as in
+    pos_class_a1.decode.
+
+    Enumerations (status, time_mode, special_manoeuvre, sync) are their integer
+    values, values that decode to None are NaN, and spare and comm_state are
+    integers.
+
+    :param ref_time: Reference time in epoch seconds, for the whole batch or
+                     per payload. If given, time is a column of epoch seconds
+                     reconstructed from it; otherwise there is no time column.
+    """
+    values = payloads_to_array(payloads)
+    if not payloads:
+        # Empty columns
+        values = np.empty((0, 28), dtype=np.uint8)
+    if values.shape[1] != 28:
+        raise ValueError(f'Position reports have 28 characters, not {values.shape[1]}')
+
+    fields = (Field('msg_type', 6),) + pos_class_a1.FIELDS[1:]
+    raw = decode_columns(values, fields)
+    if not np.isin(raw['msg_type'], (1, 2, 3)).all():
+        raise ValueError('Not all payloads are type 1, 2 or 3 position reports')
+
+    avail, turn_min, turn_max = _decode_turn(raw['turn_indicate_avail'])
+    second = raw['time_mode']
+    course = raw['course_deg']
+    heading = raw['heading_deg']
+
+    columns = {
+        'msg_type': raw['msg_type'].astype(np.uint8),
+        'repeat': raw['repeat'].astype(np.uint8),
+        'mmsi': raw['mmsi'].astype(np.uint32),
+        'status': raw['status'].astype(np.uint8),
+        'turn_indicate_avail': avail,
+        'turn_min_dps': turn_min,
+        'turn_max_dps': turn_max,
+        'speed_knots': raw['speed_knots'] / 10,
+        'accuracy_sub_10m': raw['accuracy_sub_10m'].astype(bool),
+        'long_deg': _decode_pos(raw['long_deg'], 181),
+        'lat_deg': _decode_pos(raw['lat_deg'], 91),
+        'course_deg': np.where(course == 3600, np.nan, course / 10),
+        'heading_deg': np.where(heading == 511, np.nan, heading),
+        'time_mode': np.where(second >= 60, second, 0).astype(np.uint8),
+        'second': second.astype(np.uint8),
+        'special_manoeuvre': raw['special_manoeuvre'].astype(np.uint8),
+        'spare': raw['spare'].astype(np.uint8),
+        'raim_in_use': raw['raim_in_use'].astype(bool),
+        'sync': raw['sync'].astype(np.uint8),
+        'slot_timeout': raw['slot_timeout'].astype(np.uint8),
+        'comm_state': raw['comm_state'].astype(np.uint16),
+    }
+    if ref_time is not None:
+        columns['time'] = _decode_time(second, ref_time)
+    return columns
@@ -0,0 +1,426 @@
+"""
+Benchmarks for the decoding pipeline.
+
+Run with ``python -m pyais.bench``. Every stage is timed separately on a
+checked-in corpus (bench_corpus.nmea) that mixes single and multi-sentence
+messages, other sentences and bad lines:
+
+    split       line splitting of a memory-mapped file
+    parse       NMEAMessage parsing and checksum verification
+    bits        Bits construction from complete payloads
+    decode/N    the decoder of message type N
+    raw/N       the decoder of the raw profile of message type N
+    end_to_end  FileStream iteration and AISMessage decoding
+
+Results can be saved as JSON with --output, and compared with an earlier
+run with --compare to spot throughput regressions. --legacy compares some
+stages with the implementations they replaced, and --memory compares the
+memory held per message by the ways of keeping decoded messages.
+"""
+
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from functools import reduce
+from operator import xor
+from timeit import repeat
+from typing import Callable, Dict, List, Tuple
+
+from bitarray import bitarray
+
+from . import ais
+from .ais_message import AISMessage
+from .bits import Bits
+from .nmea_message import NMEAMessage, NMEAType
+from .records import to_record
+from .stream import FileStream, LineAssembler
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'bench_corpus.nmea')
+
+# Fixed reference time, so that decoding does not depend on the clock
+REF_TIME = 1171830306.92
+
+PAYLOADS = (
+    '15M67FC000G?ufbE`FepT@3n00Sa',
+    '15NG6V0P01G?cFhE`R2IU?wn28R>',
+    '15NJQiPOl=G?m:bE`Gpt<aun00S8',
+    '15NPOOPP00o?bIjE`UEv4?wF2HIU',
+    '35NVm2gP00o@5k:EbbPJnwwN25e3',
+    'B52KlJP00=l4be5ItJ6r3wVUWP06',
+    '53ku:202=kul=4TS@00<tq@V0<uE84LD00000017R@sEE6TE0GUDk1hP',
+    '55Mwm;P00001L@?;SKE8uT4j0lDh8uE8pD00000l0`A276S<07gUDp3Q',
+)
+
+SENTENCES = tuple(
+    f'!AIVDM,1,1,,B,{p},0*{reduce(xor, f"AIVDM,1,1,,B,{p},0".encode()):02X}'
+    for p in PAYLOADS
+)
+
+
+def _legacy_bits(ascii6: str) -> bitarray:
+    # The original per-character construction, kept for comparison
+    bits = bitarray(endian='little')
+    for a in ascii6:
+        bits.frombytes(bytes((Bits.char_to_bin(a),)))
+        bits.pop()
+        bits.pop()
+    return bits
+
+
+def _legacy_uint(bits: bitarray, read_at: int, n: int) -> int:
+    x = bits[read_at: read_at + n]
+    x.fill()
+    while len(x) < 32:
+        x.frombytes(b'\0')
+    return int.from_bytes(x.tobytes(), 'little')
+
+
+def _legacy_nmea(raw: str) -> tuple:
+    # The original split-based parser and generator checksum, kept for comparison
+    fields = raw.split(',')
+    msg_type = fields[0]
+    nmea_type = NMEAType(msg_type[0])
+    talker = msg_type[1:3]
+    msg_type = msg_type[3:]
+    sentence_count, sentence_index, seq_id, channel, data, checksum = fields[1:]
+    sentence_count = int(sentence_count)
+    sentence_index = int(sentence_index)
+    actual = reduce(xor, (ord(c) for c in raw[1:].split('*', 1)[0]))
+    assert actual == int(checksum[2:], 16)
+    return nmea_type, talker, msg_type, sentence_count, sentence_index, seq_id, channel, data
+
+
+def _per_payload(func: Callable, number: int = 2000, rounds: int = 5) -> float:
+    """Best-of-rounds time in microseconds to process every payload once."""
+    best = min(repeat(func, number=number, repeat=rounds))
+    return best / number / len(PAYLOADS) * 1e6
+
+
+def _compare(legacy: Callable, current: Callable, number: int) -> dict:
+    old = _per_payload(legacy, number)
+    new = _per_payload(current, number)
+    return {'legacy_us': old, 'current_us': new, 'speedup': old / new}
+
+
+def bench_bits(number: int = 2000) -> dict:
+    def legacy():
+        for p in PAYLOADS:
+            b = _legacy_bits(p)
+            _legacy_uint(b, 0, 6)
+            _legacy_uint(b, 8, 30)
+
+    def current():
+        for p in PAYLOADS:
+            b = Bits(p)
+            b.uint(6)
+            b.uint(2)
+            b.uint(30)
+
+    return _compare(legacy, current, number)
+
+
+def bench_nmea(number: int = 2000) -> dict:
+    encoded = tuple(s.encode() for s in SENTENCES)
+
+    def legacy():
+        for s in SENTENCES:
+            _legacy_nmea(s)
+
+    def current():
+        for s in encoded:
+            NMEAMessage(s)
+
+    return _compare(legacy, current, number)
+
+
+def _measure(func: Callable[[], int], number: int, rounds: int) -> dict:
+    """
+    Time func, which processes some items and returns how many, and measure
+    the memory it allocates.
+    """
+    items = func()
+    seconds = min(repeat(func, number=number, repeat=rounds)) / number
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    blocks = sys.getallocatedblocks()
+    func()
+    retained = sys.getallocatedblocks() - blocks
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        'items': items,
+        'seconds': seconds,
+        'items_per_sec': items / seconds if seconds else 0,
+        'us_per_item': seconds / items * 1e6 if items else 0,
+        'alloc_peak_bytes': peak,
+        'retained_blocks': retained,
+    }
+
+
+def _skip_errors(stream: FileStream):
+    # Iterate a FileStream past lines that fail to parse
+    while True:
+        try:
+            yield from stream
+            return
+        except ValueError:
+            pass  # Iterating again resumes with the next line
+
+
+def _prepare(corpus: str, copies: int) -> Tuple[str, List[bytes], List[str]]:
+    with open(corpus, 'rb') as f:
+        data = f.read()
+
+    fd, path = tempfile.mkstemp(suffix='.nmea')
+    with os.fdopen(fd, 'wb') as f:
+        for _ in range(copies):
+            f.write(data)
+
+    lines = [line.rstrip() for line in data.split(b'\n') if line.strip()]
+    with FileStream(corpus) as stream:
+        payloads = [
+            msg.payload for msg in _skip_errors(stream)
+            if msg.payload is not None
+        ]
+    return path, lines, payloads
+
+
+def run(corpus: str = CORPUS, copies: int = 100, number: int = 20, rounds: int = 5) -> dict:
+    """
+    Benchmark each stage. The corpus is repeated copies times for the file
+    based stages; the other stages process it number times per round.
+    """
+    path, lines, payloads = _prepare(corpus, copies)
+    stages: Dict[str, dict] = {}
+
+    try:
+        def split():
+            with FileStream(path) as stream:
+                return sum(1 for _ in stream._recv_loop())
+
+        def parse():
+            n = 0
+            for line in lines:
+                try:
+                    NMEAMessage(line)
+                except ValueError:
+                    pass
+                n += 1
+            return n
+
+        def build_bits():
+            for p in payloads:
+                Bits(p)
+            return len(payloads)
+
+        def end_to_end():
+            n = 0
+            with FileStream(path) as stream:
+                for msg in _skip_errors(stream):
+                    if AISMessage.is_ais(msg):
+                        try:
+                            AISMessage(msg, ref_time=REF_TIME)
+                        except ValueError:
+                            pass
+                    n += 1
+            return n
+
+        stages['split'] = _measure(split, 1, rounds)
+        stages['parse'] = _measure(parse, number, rounds)
+        stages['bits'] = _measure(build_bits, number, rounds)
+
+        by_type: Dict[int, List[Bits]] = {}
+        for b in map(Bits, payloads):
+            by_type.setdefault(b.uint_at(0, 6), []).append(b)
+        for msg_type, group in sorted(by_type.items()):
+            decoder = ais.DECODERS.get(msg_type)
+            if decoder is None:
+                continue
+
+            def decode(decoder=decoder, group=group):
+                for b in group:
+                    decoder(b, REF_TIME)
+                return len(group)
+
+            stages[f'decode/{msg_type}'] = _measure(decode, number, rounds)
+
+        for msg_type, group in sorted(by_type.items()):
+            decoder = ais.raw_decoder(msg_type)
+            if decoder is None or ais.DECODERS.get(msg_type) is None:
+                continue
+
+            def decode_raw(decoder=decoder, group=group):
+                for b in group:
+                    decoder(b, REF_TIME)
+                return len(group)
+
+            stages[f'raw/{msg_type}'] = _measure(decode_raw, number, rounds)
+
+        stages['end_to_end'] = _measure(end_to_end, 1, rounds)
+    finally:
+        os.remove(path)
+
+    with open(corpus, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+    return {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'corpus': {'path': os.path.basename(corpus), 'sha256': digest, 'copies': copies},
+        'stages': stages,
+    }
+
+
+def report(result: dict):
+    print(f'{"stage":<14}{"items":>8}{"items/s":>14}{"us/item":>10}{"peak KiB":>10}{"retained":>10}')
+    for name, stage in result['stages'].items():
+        print(
+            f'{name:<14}{stage["items"]:>8}{stage["items_per_sec"]:>14,.0f}'
+            f'{stage["us_per_item"]:>10.2f}{stage["alloc_peak_bytes"] / 1024:>10.1f}'
+            f'{stage["retained_blocks"]:>10}'
+        )
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1) -> List[str]:
+    """
+    Print the change in throughput of every stage, and return the names of
+    the stages that slowed down by more than threshold.
+    """
+    if old['corpus']['sha256'] != new['corpus']['sha256']:
+        print('Warning: the runs used different corpora')
+
+    regressions = []
+    print(f'{"stage":<14}{"old items/s":>14}{"new items/s":>14}{"change":>9}')
+    for name, stage in new['stages'].items():
+        prev = old['stages'].get(name)
+        if prev is None:
+            print(f'{name:<14}{"-":>14}{stage["items_per_sec"]:>14,.0f}')
+            continue
+        change = stage['items_per_sec'] / prev['items_per_sec'] - 1
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<14}{prev["items_per_sec"]:>14,.0f}{stage["items_per_sec"]:>14,.0f}{change:>+9.1%}{flag}')
+    return regressions
+
+
+# Representation -> how a complete message is held
+REPRESENTATIONS = {
+    'message': lambda msg: AISMessage(msg, ref_time=REF_TIME),
+    'message_no_nmea': lambda msg: AISMessage(msg, ref_time=REF_TIME, keep_nmea=False),
+    'message_record': lambda msg: AISMessage(msg, ref_time=REF_TIME, record=True, keep_nmea=False),
+    'record': lambda msg: to_record(msg, REF_TIME),
+}
+
+
+def bench_memory(corpus: str = CORPUS, copies: int = 200) -> Dict[str, float]:
+    """
+    Bytes held per decoded message, for each representation, measured over
+    the messages of the corpus repeated copies times.
+    """
+    with open(corpus, 'rb') as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+
+    # A message of each type in the corpus, by the first payload character
+    samples = {}
+    assembler = LineAssembler()
+    for line in lines:
+        try:
+            msg = assembler._assemble(line)
+        except ValueError:
+            continue
+        if msg is not None and msg.payload:
+            samples.setdefault(msg.payload[0], msg)
+    lines *= copies
+
+    result = {}
+    for name, hold in REPRESENTATIONS.items():
+        # Decoders and record classes are compiled on first use, which is
+        # not what is measured
+        for msg in samples.values():
+            hold(msg)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+
+        assembler = LineAssembler()
+        kept = []
+        for line in lines:
+            try:
+                msg = assembler._assemble(line)
+            except ValueError:
+                continue
+            if msg is not None and msg.payload:
+                kept.append(hold(msg))
+        del assembler, msg
+        gc.collect()
+
+        held = tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(kept)
+        tracemalloc.stop()
+        result[name] = held / len(kept)
+        del kept
+    return result
+
+
+def legacy():
+    for title, result in (
+        ('Bits construction + header reads', bench_bits()),
+        ('NMEAMessage parse + verify from bytes', bench_nmea()),
+    ):
+        print(f'{title}, per payload:')
+        print(f'  legacy:  {result["legacy_us"]:8.2f} us')
+        print(f'  current: {result["current_us"]:8.2f} us')
+        print(f'  speedup: {result["speedup"]:8.1f}x')
+
+
+def main():
+    parser = ArgumentParser(prog='python -m pyais.bench', description='Benchmark the decoding pipeline')
+    parser.add_argument('--corpus', default=CORPUS, help='NMEA file to benchmark with')
+    parser.add_argument('--copies', type=int, default=100, help='corpus copies for the file based stages')
+    parser.add_argument('--number', type=int, default=20, help='corpus passes per round for the other stages')
+    parser.add_argument('--rounds', type=int, default=5, help='rounds, of which the fastest counts')
+    parser.add_argument('-o', '--output', help='save the results to this JSON file')
+    parser.add_argument('-c', '--compare', help='compare with the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown, as a fraction, that counts as a regression')
+    parser.add_argument('--legacy', action='store_true', help='compare with the replaced implementations instead')
+    parser.add_argument('--memory', action='store_true', help='measure the memory held per decoded message instead')
+    args = parser.parse_args()
+
+    if args.legacy:
+        legacy()
+        return
+    if args.memory:
+        for name, size in bench_memory(args.corpus).items():
+            print(f'{name:<18}{size:>8.0f} bytes/message')
+        return
+
+    result = run(args.corpus, args.copies, args.number, args.rounds)
+    report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print()
+        if compare(old, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
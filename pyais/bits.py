@@ -1,46 +1,121 @@
-from struct import unpack
+from typing import Dict, List, Tuple
 
 from bitarray import bitarray
 
 
+def _build_tables() -> (dict, tuple):
+    """
+    Build the armoring translation tables. Every valid payload character maps
+    to its six-bit value as a string of '0'/'1'; every other ASCII character
+    maps to a sentinel that int() is guaranteed to reject.
+    """
+    binary = {c: '!' for c in range(0x80)}
+    values = [None] * 0x80
+    for c in range(0x30, 0x58):
+        values[c] = c - 0x30
+    for c in range(0x60, 0x78):
+        values[c] = c - 0x38
+    for c, v in enumerate(values):
+        if v is not None:
+            binary[c] = f'{v:06b}'
+    return binary, tuple(values)
+
+
+# Character -> '010111' for str.translate, and ord(character) -> six-bit value
+ASCII6_TO_BIN, ASCII6_TO_INT = _build_tables()
+
+# Group count -> (shift, mask) steps of spread6()
+_spread_steps: Dict[int, List[Tuple[int, int]]] = {}
+
+
+def _build_spread_steps(n: int) -> List[Tuple[int, int]]:
+    # The groups start packed in one block of size (a power of two) >= n
+    # groups. Each step splits every block in two halves and moves the upper
+    # half up by two bits per group of the lower half, until every group
+    # sits in a block of one byte.
+    size = 1
+    while size < n:
+        size <<= 1
+    steps = []
+    while size > 1:
+        half = size >> 1
+        low = (1 << 6*half) - 1
+        mask = 0
+        for block in range(n // size + 1):
+            mask |= low << 8*size*block
+        steps.append((2*half, mask))
+        size = half
+    return steps
+
+
+def spread6(value: int, n: int) -> bytes:
+    """
+    The n six-bit groups of value, most significant first, as n bytes.
+
+    Rather than extracting the groups one at a time, all of them are moved
+    into place together, in a number of shift and mask steps that only grows
+    with the logarithm of n. The bytes can then be mapped to characters with
+    bytes.translate().
+    """
+    steps = _spread_steps.get(n)
+    if steps is None:
+        steps = _spread_steps[n] = _build_spread_steps(n)
+    for shift, mask in steps:
+        value = (value & mask) | (value & ~mask) << shift
+    return value.to_bytes(n, 'big')
+
+
 class Bits:
     """
-    bitarray is missing some features, and bitstring is fundamentally broken
-    when it comes to LSB bit ordering.
+    A big-endian bit buffer over an armored (six-bit ASCII) AIS payload.
+
+    The whole payload is converted in one pass into a single Python int;
+    reads are then shifts and masks on that int, and fields may be of any
+    width.
     """
 
-    def __init__(self, ascii6: str):
-        self.bits = bitarray(endian='little')
-        self.read_at = 0
+    __slots__ = ('value', 'length', 'read_at')
 
-        for a in ascii6:
-            byte = self.char_to_bin(a)
-            self.bits.frombytes(bytes((byte,)))
-            self.bits.pop()
-            self.bits.pop()
+    def __init__(self, ascii6: str, fill_bits: int = 0):
+        """
+        :param fill_bits: The number of bits padding the last character, which
+                          are dropped.
+        """
+        try:
+            if not ascii6.isascii():
+                raise ValueError()
+            self.value = int(ascii6.translate(ASCII6_TO_BIN), 2) if ascii6 else 0
+        except ValueError:
+            for c in ascii6:
+                self.char_to_bin(c)
+            raise
+        self.length = 6 * len(ascii6)
+        if 0 < fill_bits <= self.length:
+            self.value >>= fill_bits
+            self.length -= fill_bits
+        self.read_at = 0
 
     @staticmethod
     def char_to_bin(c: str) -> int:
         c = ord(c)
-
-        if 0x30 <= c <= 0x57:
-            c -= 0x30
-        elif 0x60 <= c <= 0x77:
-            c -= 0x38
-        else:
+        v = ASCII6_TO_INT[c] if c < 0x80 else None
+        if v is None:
             raise ValueError(f'Invalid data character {c}')
+        return v
 
-        return c
+    def __len__(self) -> int:
+        return self.length
+
+    def uint_at(self, start: int, n: int) -> int:
+        """Read n bits at an absolute position, without moving read_at."""
+        shift = self.length - start - n
+        if shift < 0:
+            raise ValueError(f'Cannot read {n} bits; only {self.length - start} left')
+        return (self.value >> shift) & ((1 << n) - 1)
 
     def uint(self, n: int) -> int:
-        if n > 32:
-            raise NotImplementedError()
-
-        bits = self.raw(n)
-        bits.fill()
-        while len(bits) < 32:
-            bits.frombytes(b'\0')
-        (x,) = unpack('<I', bits.tobytes())
+        x = self.uint_at(self.read_at, n)
+        self.read_at += n
         return x
 
     def int(self, n: int) -> int:
@@ -50,16 +125,13 @@ class Bits:
         return x
 
     def bool(self) -> bool:
-        x = self.bits[self.read_at]
-        self.read_at += 1
-        return x
+        return bool(self.uint(1))
 
     def raw(self, n: int) -> bitarray:
-        x = self.bits[self.read_at: self.read_at + n]
-        self.read_at += n
-        return x
+        x = self.uint(n)
+        return bitarray(format(x, f'0{n}b')) if n else bitarray()
 
     def end(self):
-        slack = len(self.bits) - self.read_at
+        slack = self.length - self.read_at
         if slack != 0:
             raise ValueError(f'{slack} bits left after decoding')
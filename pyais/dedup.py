@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Optional
+
+
+class DuplicateFilter:
+    """
+    Suppression of repeated payloads, as received from several overlapping
+    stations. A payload is a duplicate if it was first seen less than window
+    seconds before or after it.
+
+    Time is that of the message where known, such as the receiver time of a
+    tagged log line, so that a replayed log is filtered as it was received;
+    otherwise it is read from clock. To filter a replay of untagged lines by
+    their original timing, pass a clock that returns the time of the line
+    being replayed.
+
+    Payloads are kept in first-seen order, so both expiry and eviction of the
+    oldest entry past max_size take constant time. Times of different
+    receivers arrive out of order, and a mix of message and clock times is
+    not ordered at all, so expiry can stop short of entries that are already
+    outside the window; a hit on such an entry counts as a new payload.
+    """
+
+    def __init__(
+        self,
+        window: float = 10,
+        max_size: int = 100_000,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.window = window
+        self.max_size = max_size
+        self.clock = clock
+        self.seen: 'OrderedDict[str, float]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def is_duplicate(self, payload: str, time: Optional[float] = None) -> bool:
+        """
+        :param time: The time the message was received, in seconds; the
+                     clock is read if not given.
+        """
+        now = self.clock() if time is None else time
+        seen = self.seen
+
+        limit = now - self.window
+        while seen:
+            oldest, first_seen = next(iter(seen.items()))
+            if first_seen >= limit:
+                break
+            del seen[oldest]
+
+        first_seen = seen.get(payload)
+        if first_seen is not None:
+            if abs(now - first_seen) < self.window:
+                self.hits += 1
+                return True
+            del seen[payload]  # Stale; seen anew, so moved to the end
+
+        seen[payload] = now
+        if len(seen) > self.max_size:
+            seen.popitem(last=False)
+        self.misses += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.seen),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
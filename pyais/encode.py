@@ -0,0 +1,270 @@
+"""
+Encoding of AIS messages into armored payloads and NMEA0183 sentences.
+
+Encoders are compiled from the same field tables as the decoders, so every
+type with a field table can be encoded. Field values are given as the
+decoders return them (floats in degrees and knots, enums, text, ...), and
+each field is converted back by the inverse of its converter. A round trip
+through encoding and decoding reproduces the fields, though not necessarily
+the spare bits or text padding of a received payload.
+"""
+
+from datetime import datetime
+from enum import Enum, EnumMeta
+from itertools import count
+from math import inf, sqrt
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from bitarray import bitarray
+
+from . import ais
+from .ais import static
+from .ais.pos_class_a1 import (
+    TimeMode, decode_course, decode_heading, decode_lat, decode_long,
+    decode_speed, decode_time, decode_turn,
+)
+from .ais.static_and_voyage import decode_draught
+from .bits import spread6
+from .nmea_message import checksum
+from .schema import ASCII6_TEXT, Field, raw, text
+
+# Six-bit value -> payload character, as a bytes.translate() table
+ARMOR = bytes(v + 0x30 if v < 0x28 else v + 0x38 for v in range(0x40)).ljust(0x100, b'\0')
+
+# Text character -> six-bit value
+TEXT_VALUES = {c: v for v, c in enumerate(ASCII6_TEXT)}
+
+# Payload characters per sentence, which keeps sentences within the 82
+# characters allowed by NMEA0183
+MAX_PAYLOAD_CHARS = 60
+
+
+def encode_text(s: Optional[str], width: int) -> int:
+    """Six-bit ASCII text, padded with '@'. Unknown characters become '?'."""
+    n = width // 6
+    value = 0
+    for c in (s or '').upper()[:n].ljust(n, '@'):
+        value = value << 6 | TEXT_VALUES.get(c, 0x3F)
+    return value << (width - 6*n)
+
+
+def encode_raw(bits, width: int) -> int:
+    if isinstance(bits, bitarray):
+        return int(bits.to01(), 2) if len(bits) else 0
+    return int(bits or 0)
+
+
+def encode_pos(degrees: Optional[float], undef: int) -> int:
+    if degrees is None:
+        degrees = undef
+    return round(degrees * 600_000)
+
+
+def encode_long(degrees: Optional[float]) -> int:
+    return encode_pos(degrees, 181)
+
+
+def encode_lat(degrees: Optional[float]) -> int:
+    return encode_pos(degrees, 91)
+
+
+def encode_speed(knots: Optional[float]) -> int:
+    return 1023 if knots is None else round(knots * 10)
+
+
+def encode_course(degrees: Optional[float]) -> int:
+    return 3600 if degrees is None else round(degrees * 10)
+
+
+def encode_heading(degrees: Optional[int]) -> int:
+    return 511 if degrees is None else round(degrees)
+
+
+def encode_draught(metres: Optional[float]) -> int:
+    return 0 if metres is None else round(metres * 10)
+
+
+def encode_turn(avail: bool, min_dps: Optional[float], max_dps: Optional[float]) -> int:
+    if min_dps is None:
+        return -128
+    if min_dps == -inf:
+        return -127
+    if max_dps == inf:
+        return 127
+    # ROTAIS = 4.733 SQRT(ROTsensor) °/min
+    turn = min(round(4.733 * sqrt(abs(min_dps) * 60)), 126)
+    return -turn if min_dps < 0 else turn
+
+
+def encode_time(mode, stamp: Optional[datetime]) -> int:
+    if stamp is not None:
+        return stamp.second
+    if mode is None or TimeMode(mode) is TimeMode.EPFS:
+        return TimeMode.UNAVAILABLE.value
+    return TimeMode(mode).value
+
+
+# Converter of a decoded field -> inverse, from the decoded value to the
+# field integer. Inverses of text and raw are also given the field width;
+# those of multi-key fields get one argument per key.
+INVERSES: Dict[Callable, Callable] = {
+    text: encode_text,
+    raw: encode_raw,
+    decode_long: encode_long,
+    decode_lat: encode_lat,
+    decode_speed: encode_speed,
+    decode_course: encode_course,
+    decode_heading: encode_heading,
+    decode_draught: encode_draught,
+    decode_turn: encode_turn,
+    decode_time: encode_time,
+}
+
+WIDTH_INVERSES = (encode_text, encode_raw)
+
+
+def _enum_value(x) -> int:
+    return x.value if isinstance(x, Enum) else int(x)
+
+
+def compile_encoder(fields: Sequence[Field], msg_type: int, name: str = 'encode') -> Callable[[dict], Tuple[int, int]]:
+    """
+    Generate an encoder for a field table, returning the payload as an
+    integer and its length in bits. Missing keys are encoded as not
+    available where the field has such a value, and as zero bits otherwise.
+    """
+    namespace = {'_enum_value': _enum_value}
+    lines = [
+        f'def {name}(d):',
+        '    get = d.get',
+        f'    v = {msg_type}',
+        f'    n = {fields[0].width}',
+    ]
+
+    for i, field in enumerate(fields[1:], 1):
+        width = field.width
+        convert = field.convert
+        if field.name is None:
+            lines.append(f'    v <<= {width}')
+            lines.append(f'    n += {width}')
+            continue
+
+        names = field.name if isinstance(field.name, tuple) else (field.name,)
+        args = ', '.join(f'get({key!r})' for key in names)
+
+        if convert is None:
+            expr = f'int(get({names[0]!r}) or 0)'
+        elif convert is bool:
+            expr = f'1 if get({names[0]!r}) else 0'
+        elif isinstance(convert, EnumMeta):
+            expr = f'_enum_value(get({names[0]!r}) or 0)'
+        else:
+            inverse = INVERSES.get(convert)
+            if inverse is None:
+                raise ValueError(f'No inverse of the converter of field {field.name}')
+            namespace[f'e{i}'] = inverse
+            if width is None:
+                # The variable final field is as long as its value: six bits
+                # per character of text, or the bits themselves
+                bits_per_item = 6 if inverse is encode_text else 1
+                lines.append(f'    x = get({names[0]!r})')
+                lines.append(f'    w = 0 if x is None else {bits_per_item} * len(x)')
+                lines.append(f'    v = v << w | e{i}(x, w)')
+                lines.append('    n += w')
+                continue
+            if inverse in WIDTH_INVERSES:
+                expr = f'e{i}(get({names[0]!r}), {width})'
+            else:
+                expr = f'e{i}({args})'
+
+        lines.append(f'    v = v << {width} | ({expr}) & {(1 << width) - 1:#x}')
+        lines.append(f'    n += {width}')
+
+    lines.append('    return v, n')
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+# Message type -> encoder, compiled on first use
+_encoders: Dict[int, Callable[[dict], Tuple[int, int]]] = {}
+_encoders_24 = (
+    compile_encoder(static.FIELDS_A, 24, name='encode_a'),
+    compile_encoder(static.FIELDS_B, 24, name='encode_b'),
+)
+
+
+def encoder(msg_type: int) -> Callable[[dict], Tuple[int, int]]:
+    if msg_type == 24:
+        return _encode_24
+    result = _encoders.get(msg_type)
+    if result is None:
+        fields = ais.FIELDS.get(msg_type)
+        if fields is None:
+            raise ValueError(f'Cannot encode message type {msg_type}')
+        result = _encoders[msg_type] = compile_encoder(fields, msg_type)
+    return result
+
+
+def _encode_24(d: dict) -> Tuple[int, int]:
+    return _encoders_24[d.get('part_num', 0) & 1](d)
+
+
+def armor(value: int, length: int) -> Tuple[str, int]:
+    """
+    Six-bit ASCII armoring of the length bits of value. Returns the payload
+    and the number of fill bits added to complete its last character.
+    """
+    fill = -length % 6
+    return spread6(value << fill, (length + fill) // 6).translate(ARMOR).decode('ascii'), fill
+
+
+def encode_payload(msg_type: int, fields: dict) -> Tuple[str, int]:
+    """The armored payload of a message, and its number of fill bits."""
+    return armor(*encoder(msg_type)(fields))
+
+
+def sentences(
+    payload: str,
+    fill: int = 0,
+    channel: str = 'A',
+    seq_id: Optional[int] = None,
+    talker: str = 'AI',
+    max_chars: int = MAX_PAYLOAD_CHARS,
+) -> List[str]:
+    """
+    The !xxVDM sentences carrying a payload, split into several when it is
+    longer than max_chars. Multi-sentence messages need a seq_id from 0 to 9.
+    """
+    parts = [payload[i:i + max_chars] for i in range(0, len(payload), max_chars)] or ['']
+    total = len(parts)
+    if total > 9:
+        raise ValueError(f'A payload of {len(payload)} characters needs more than 9 sentences')
+    if total == 1:
+        seq = ''
+    elif seq_id is None:
+        raise ValueError('A multi-sentence message needs a sequence ID')
+    else:
+        seq = str(seq_id)
+
+    result = []
+    for index, part in enumerate(parts, 1):
+        body = f'{talker}VDM,{total},{index},{seq},{channel},{part},{fill if index == total else 0}'
+        result.append(f'!{body}*{checksum(body.encode()):02X}')
+    return result
+
+
+class Encoder:
+    """
+    Encodes messages into sentences, numbering multi-sentence messages with
+    sequence IDs 0-9 in turn.
+    """
+
+    def __init__(self, channel: str = 'A', talker: str = 'AI'):
+        self.channel = channel
+        self.talker = talker
+        self._seq: Iterator[int] = (i % 10 for i in count())
+
+    def encode(self, msg_type: int, fields: dict) -> List[str]:
+        payload, fill = encode_payload(msg_type, fields)
+        seq_id = next(self._seq) if len(payload) > MAX_PAYLOAD_CHARS else None
+        return sentences(payload, fill, self.channel, seq_id, self.talker)
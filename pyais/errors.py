@@ -0,0 +1,53 @@
+from collections import Counter, deque
+from typing import Deque, NamedTuple, Optional, Union
+
+from .nmea_message import MALFORMED
+
+# Reason for messages that parsed but failed to decode
+DECODE_FAILED = 'decode'
+
+
+class Invalid(NamedTuple):
+    reason: str
+    line: Union[str, bytes]
+    error: str
+
+
+class InvalidLines:
+    """
+    The error channel of a stream: lines that fail to parse are counted here
+    by reason, and the stream carries on with the next line instead of
+    raising. The last keep invalid lines can also be kept, for inspection:
+
+        errors = InvalidLines(keep=100)
+        with Stream(errors=errors) as s:
+            for msg in s:
+                ...
+        print(errors.counts, list(errors.lines))
+
+    Reasons are the codes of nmea_message.ValidationError, or MALFORMED for
+    lines that could not be split into fields at all.
+    """
+
+    def __init__(self, keep: int = 0):
+        """
+        :param keep: How many of the most recent invalid lines to keep; none
+                     by default.
+        """
+        self.counts: Counter = Counter()
+        self.lines: Optional[Deque[Invalid]] = deque(maxlen=keep) if keep else None
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, line: Union[str, bytes], error: Exception, reason: Optional[str] = None):
+        if reason is None:
+            reason = getattr(error, 'reason', MALFORMED)
+        self.counts[reason] += 1
+        if self.lines is not None:
+            # The message only, so that the traceback and its frames are freed
+            self.lines.append(Invalid(reason, line, str(error)))
+
+    def stats(self) -> dict:
+        return dict(self.counts)
@@ -0,0 +1,222 @@
+import json
+import os
+from bisect import bisect_left
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+from .ais_message import AISMessage
+from .nmea_message import NMEAMessage
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 1e-2, 1e-1, 1.0,
+)
+
+STAGES = ('recv', 'parse', 'reassembly', 'decode')
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds, in seconds."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {
+            'buckets': dict(zip(self.bounds + (float('inf'),), self.counts)),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class Metrics:
+    """
+    Counters and per-stage latency histograms of a decoding pipeline.
+
+    Pass one to a stream as metrics=...; streams without one are not
+    instrumented at all. Stages are:
+
+        recv        waiting for and splitting the next line
+        parse       NMEAMessage parsing and checksum verification
+        reassembly  reassembly and duplicate suppression
+        decode      AISMessage decoding, when done through decode()
+
+    Counters are plain attributes updated without locking, so a Metrics
+    should be shared only by streams running in the same thread.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, clock: Callable[[], float] = perf_counter):
+        self.clock = clock
+        self.stages: Dict[str, Histogram] = {stage: Histogram(buckets) for stage in STAGES}
+
+        # Complete AIS messages by message type
+        self.messages: Counter = Counter()
+        # Lines that could not be parsed, other than for their checksum
+        self.parse_failures = 0
+        self.checksum_failures = 0
+        # AIS messages that failed to decode in decode()
+        self.decode_failures = 0
+
+        # Name -> functions returning the stats() of a component, such as a
+        # reassembler, as the keys of a dict so that each is kept once; read
+        # only when a snapshot is taken
+        self._watched: Dict[str, Dict[Callable[[], dict], None]] = {}
+
+    def watch(self, name: str, stats: Callable[[], dict]):
+        """
+        Include the stats of a component in snapshots. The stats of components
+        watched under the same name are summed, each counted once however
+        often it is watched.
+        """
+        self._watched.setdefault(name, {})[stats] = None
+
+    def unwatch(self, name: str, stats: Callable[[], dict]):
+        """Stop including the stats of a component, e.g. one discarded."""
+        funcs = self._watched.get(name)
+        if funcs is not None:
+            funcs.pop(stats, None)
+
+    def timed(self, stage: str, iterable: Iterable) -> Iterator:
+        """Time how long each item of iterable takes to produce."""
+        observe = self.stages[stage].observe
+        clock = self.clock
+        it = iter(iterable)
+        while True:
+            start = clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            observe(clock() - start)
+            yield item
+
+    def decode(self, nmea: NMEAMessage, **kwargs) -> AISMessage:
+        """Construct an AISMessage, timing it as the decode stage."""
+        start = self.clock()
+        try:
+            msg = AISMessage(nmea, **kwargs)
+        except Exception:
+            self.decode_failures += 1
+            raise
+        self.stages['decode'].observe(self.clock() - start)
+        return msg
+
+    def snapshot(self) -> dict:
+        watched = {}
+        for name, funcs in list(self._watched.items()):
+            totals = Counter()
+            for stats in list(funcs):
+                totals.update(stats())
+            watched[name] = dict(totals)
+
+        reassembly = watched.get('reassembly', {})
+        return {
+            'messages': dict(sorted(self.messages.items())),
+            'parse_failures': self.parse_failures,
+            'checksum_failures': self.checksum_failures,
+            'decode_failures': self.decode_failures,
+            'dropped_fragments': reassembly.get('dropped', 0) + reassembly.get('expired', 0),
+            'stages': {name: hist.snapshot() for name, hist in self.stages.items()},
+            **watched,
+        }
+
+    def prometheus(self, prefix: str = 'pyais') -> str:
+        """The current values in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            f'# HELP {prefix}_messages_total Complete AIS messages by type',
+            f'# TYPE {prefix}_messages_total counter',
+        ]
+        lines += (f'{prefix}_messages_total{{type="{t}"}} {n}' for t, n in snap['messages'].items())
+
+        for name in ('parse_failures', 'checksum_failures', 'decode_failures', 'dropped_fragments'):
+            lines += (
+                f'# TYPE {prefix}_{name}_total counter',
+                f'{prefix}_{name}_total {snap[name]}',
+            )
+
+        lines += (
+            f'# HELP {prefix}_stage_seconds Time spent per item in each pipeline stage',
+            f'# TYPE {prefix}_stage_seconds histogram',
+        )
+        for stage, hist in snap['stages'].items():
+            total = 0
+            for bound, n in hist['buckets'].items():
+                total += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {total}')
+            lines += (
+                f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {hist["sum"]!r}',
+                f'{prefix}_stage_seconds_count{{stage="{stage}"}} {hist["count"]}',
+            )
+
+        for name in self._watched:
+            for key, value in snap[name].items():
+                lines += (
+                    f'# TYPE {prefix}_{name}_{key} gauge',
+                    f'{prefix}_{name}_{key} {value}',
+                )
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str, format: str = 'prometheus'):
+        """
+        Write the current values to a file, as Prometheus text or as JSON. The
+        file is replaced atomically, so that a collector never reads half of it.
+        """
+        if format == 'json':
+            text = json.dumps(self.snapshot(), indent=2, default=str)
+        elif format == 'prometheus':
+            text = self.prometheus()
+        else:
+            raise ValueError(f'Unknown metrics format "{format}"')
+
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """
+        Serve the current values over HTTP from a daemon thread: Prometheus
+        text at /metrics, and the JSON snapshot at /metrics.json. Call
+        shutdown() on the returned server to stop.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = metrics.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(metrics.snapshot(), default=str).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,239 @@
+import selectors
+from collections import Counter, OrderedDict, deque
+from socket import AF_INET, SOCK_DGRAM, SOCK_STREAM, socket
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from .dedup import DuplicateFilter
+from .errors import InvalidLines
+from .metrics import Metrics
+from .nmea_message import POLICIES, STRICT, NMEAMessage
+from .prefilter import HeaderFilter
+from .stream import LineAssembler, LineBuffer
+
+Endpoint = Tuple[str, int]
+
+# Largest UDP datagram
+MAX_DATAGRAM = 65535
+
+
+class MultiStream:
+    """
+    NMEA0183 messages from many TCP feeds and UDP ports at once, read from a
+    single thread with a selector:
+
+        with MultiStream(tcp=[('10.0.0.1', 4001), ('10.0.0.2', 4001)], udp=[10110]) as s:
+            for source_id, msg in s:
+                ...
+
+    Sources are identified as 'host:port' for TCP feeds and 'udp:port' for UDP
+    ports. Every TCP feed, and every sender to a UDP port, has its own line
+    buffer and reassembly state, so that sequence IDs of different receivers
+    never mix. Duplicate suppression, pre-filtering, the error channel and
+    metrics are shared by all sources.
+
+    The reassembly state of UDP senders is kept in least recently used order;
+    past max_senders, that of the sender heard from least recently is
+    dropped, along with any message it was in the middle of. Its reassembly
+    counters are kept in the totals reported to metrics.
+
+    Iteration ends once every TCP feed has closed and no UDP port is open.
+    Iterating again after a line failed to parse resumes where it stopped.
+    """
+
+    BUF_SIZE = 65536
+
+    def __init__(
+        self,
+        tcp: Iterable[Endpoint] = (),
+        udp: Iterable[Union[int, Endpoint]] = (),
+        buf_size: Optional[int] = None,
+        dedup: Optional[DuplicateFilter] = None,
+        metrics: Optional[Metrics] = None,
+        prefilter: Optional[HeaderFilter] = None,
+        policy: str = STRICT,
+        errors: Optional[InvalidLines] = None,
+        max_senders: int = 1024,
+    ):
+        """
+        :param tcp: (host, port) of each feed to connect to.
+        :param udp: Ports to listen on, on all interfaces, or (host, port) to
+                    listen on one.
+        :param buf_size: Receive buffer size of each TCP feed in bytes.
+        :param max_senders: Number of UDP senders whose reassembly state is
+                            kept, over all ports.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown validation policy "{policy}"')
+        self.buf_size = self.BUF_SIZE if buf_size is None else buf_size
+        self.dedup = dedup
+        self.metrics = metrics
+        self.prefilter = prefilter
+        self.policy = policy
+        self.errors = errors
+        self.max_senders = max_senders
+
+        self.selector = selectors.DefaultSelector()
+        # Reassembly state by source ID of TCP feeds, and by (source ID,
+        # sender) of UDP senders, the latter least recently used first
+        self.assemblers: Dict[str, LineAssembler] = {}
+        self.senders: 'OrderedDict[Tuple[str, Endpoint], LineAssembler]' = OrderedDict()
+        # UDP senders whose reassembly state was dropped, and the reassembly
+        # counters they had reached
+        self.evicted_senders = 0
+        self.evicted_stats: Counter = Counter()
+        # Datagrams that failed to be received
+        self.recv_errors = 0
+        # Lines received but not yet assembled
+        self.pending: Deque[Tuple[str, LineAssembler, bytes]] = deque()
+        # Every socket opened, so that they are closed even if not yet selectable
+        self.sockets: List[socket] = []
+
+        if metrics is not None:
+            metrics.watch('reassembly', self._evicted_reassembly_stats)
+
+        try:
+            for host, port in tcp:
+                sock = socket(AF_INET, SOCK_STREAM)
+                self.sockets.append(sock)
+                sock.connect((host, port))
+                sock.setblocking(False)
+                source_id = f'{host}:{port}'
+                self.selector.register(sock, selectors.EVENT_READ, (source_id, LineBuffer(self.buf_size)))
+
+            for endpoint in udp:
+                host, port = ('', endpoint) if isinstance(endpoint, int) else endpoint
+                sock = socket(AF_INET, SOCK_DGRAM)
+                self.sockets.append(sock)
+                sock.bind((host, port))
+                sock.setblocking(False)
+                self.selector.register(sock, selectors.EVENT_READ, (f'udp:{port}', None))
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        for sock in self.sockets:
+            sock.close()
+        self.sockets.clear()
+        self.selector.close()
+
+    def sources(self) -> List[str]:
+        """The IDs of the sources still open."""
+        return [key.data[0] for key in self.selector.get_map().values()]
+
+    def _new_assembler(self) -> LineAssembler:
+        return LineAssembler(
+            dedup=self.dedup,
+            metrics=self.metrics,
+            prefilter=self.prefilter,
+            policy=self.policy,
+            errors=self.errors,
+        )
+
+    def _assembler(self, source_id: str) -> LineAssembler:
+        assembler = self.assemblers.get(source_id)
+        if assembler is None:
+            assembler = self.assemblers[source_id] = self._new_assembler()
+        return assembler
+
+    def _sender_assembler(self, source_id: str, sender: Endpoint) -> LineAssembler:
+        senders = self.senders
+        key = (source_id, sender)
+        assembler = senders.get(key)
+        if assembler is None:
+            assembler = senders[key] = self._new_assembler()
+            if len(senders) > self.max_senders:
+                # Lines already queued for it are still assembled
+                _, evicted = senders.popitem(last=False)
+                self._retire(evicted)
+        else:
+            senders.move_to_end(key)
+        return assembler
+
+    def _retire(self, assembler: LineAssembler):
+        reassembler = assembler.reassembler
+        stats = reassembler.stats()
+        del stats['in_flight']
+        self.evicted_stats.update(stats)
+        self.evicted_senders += 1
+        if self.metrics is not None:
+            self.metrics.unwatch('reassembly', reassembler.stats)
+
+    def _evicted_reassembly_stats(self) -> dict:
+        return dict(self.evicted_stats)
+
+    def __iter__(self) -> Iterable[Tuple[str, NMEAMessage]]:
+        return self._msg_loop()
+
+    def _msg_loop(self) -> Iterable[Tuple[str, NMEAMessage]]:
+        pending = self.pending
+        while pending or self._poll():
+            while pending:
+                source_id, assembler, line = pending.popleft()
+                msg = assembler._assemble(line)
+                if msg is not None:
+                    yield source_id, msg
+
+    def _poll(self) -> bool:
+        """
+        Wait until any source has data, and queue the lines received. Returns
+        False once no sources are left.
+        """
+        selector = self.selector
+        pending = self.pending
+        while not pending:
+            if not selector.get_map():
+                return False
+
+            for key, _ in selector.select():
+                sock = key.fileobj
+                source_id, buffer = key.data
+
+                if buffer is None:
+                    self._recv_datagrams(sock, source_id)
+                    continue
+
+                try:
+                    lines = buffer.recv(sock)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    lines = None  # Connection reset; treated as closed
+
+                assembler = self._assembler(source_id)
+                if lines is None:
+                    line = buffer.rest()
+                    if line:
+                        pending.append((source_id, assembler, line))
+                    selector.unregister(sock)
+                    self.sockets.remove(sock)
+                    sock.close()
+                else:
+                    pending.extend((source_id, assembler, line) for line in lines)
+        return True
+
+    def _recv_datagrams(self, sock: socket, source_id: str):
+        pending = self.pending
+        while True:
+            try:
+                data, sender = sock.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. an ICMP error reported for an earlier send; the
+                # selector reports the socket again if there is more
+                self.recv_errors += 1
+                return
+
+            assembler = self._sender_assembler(source_id, sender)
+            # Need to call rstrip() because some lines are CRLF-terminated.
+            for line in data.split(b'\n'):
+                line = line.rstrip()
+                if line:
+                    pending.append((source_id, assembler, line))
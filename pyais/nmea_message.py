@@ -1,8 +1,6 @@
 from enum import Enum
-from functools import reduce
-from operator import xor
 from pprint import pformat
-from typing import Sequence
+from typing import Optional, Sequence, Union
 
 from .bits import Bits
 
@@ -13,6 +11,64 @@ class NMEAType(Enum):
     ENCAPSULATED = '!'
 
 
+# Validation policies: strict checks everything below; lenient accepts any
+# channel and sequence ID; checksum-off also skips the checksum, e.g. for
+# logs known to be intact
+STRICT = 'strict'
+LENIENT = 'lenient'
+NO_CHECKSUM = 'checksum-off'
+POLICIES = (STRICT, LENIENT, NO_CHECKSUM)
+
+# Reasons for which a sentence is invalid
+MALFORMED = 'malformed'
+BAD_START = 'start'
+BAD_CHECKSUM = 'checksum'
+BAD_INDEX = 'index'
+BAD_CHANNEL = 'channel'
+BAD_SEQ_ID = 'seq_id'
+
+
+class ValidationError(ValueError):
+    """An invalid sentence, with the reason code of the check it failed."""
+
+    reason = MALFORMED
+
+    def __init__(self, message: str, reason: Optional[str] = None):
+        super().__init__(message)
+        if reason is not None:
+            self.reason = reason
+
+
+class ChecksumError(ValidationError):
+    reason = BAD_CHECKSUM
+
+
+# Sentence start character -> type, avoiding an Enum lookup by value
+NMEA_TYPES = {t.value: t for t in NMEAType}
+
+
+def checksum(data: bytes) -> int:
+    """
+    The XOR of all bytes of data. Rather than iterating over the bytes, the
+    data is read as one integer and folded onto itself with shifts, halving
+    the span each time until the XOR of every byte is in the lowest one.
+    """
+    x = int.from_bytes(data, 'little')
+    if len(data) > 128:
+        shift = 1 << ((len(data) << 3) - 1).bit_length() - 1
+        while shift > 512:
+            x ^= x >> shift
+            shift >>= 1
+    x ^= x >> 512
+    x ^= x >> 256
+    x ^= x >> 128
+    x ^= x >> 64
+    x ^= x >> 32
+    x ^= x >> 16
+    x ^= x >> 8
+    return x & 0xFF
+
+
 class NMEAMessage:
     """
     NMEA0183 message. Refer to
@@ -21,7 +77,8 @@ class NMEAMessage:
 
     __slots__ = (
         'raw',
-        'bits',
+        'payload',
+        '_bits',
         'nmea_type',
         'talker',
         'msg_type',
@@ -30,61 +87,121 @@ class NMEAMessage:
         'seq_id',
         'channel',
         'data',
+        'fill_bits',
+        'receiver',
+        'rx_time',
     )
 
-    STRICT = True
-
-    def __init__(self, raw: str):
+    def __init__(self, raw: Union[str, bytes, bytearray, memoryview], policy: str = STRICT):
+        """
+        :param raw: One sentence, without line terminator, either as str or as
+                    the bytes read from a socket or file.
+        :param policy: STRICT, LENIENT or NO_CHECKSUM; see POLICIES.
+        :raises ValidationError: If the sentence is invalid under the policy.
+                                 Other ValueErrors may be raised for
+                                 sentences that cannot be split into fields.
+        """
+        if isinstance(raw, str):
+            line = raw.encode('ascii')
+        else:
+            line = raw if isinstance(raw, bytes) else bytes(raw)
+            raw = line.decode('ascii')
         self.raw = raw
-        self.bits: Bits = None
-        fields = raw.split(',')
-
-        msg_type = fields[0]
-        self.nmea_type = NMEAType(msg_type[0])
-        self.talker = msg_type[1:3]
-        self.msg_type = msg_type[3:]
-        if self.nmea_type != NMEAType.ENCAPSULATED:
+        self.payload: str = None
+        self.fill_bits = 0
+        self._bits: Bits = None
+        self.receiver: str = None
+        self.rx_time: float = None
+
+        try:
+            self.nmea_type = NMEA_TYPES[raw[0]]
+        except (IndexError, KeyError):
+            raise ValidationError(f'Invalid NMEA sentence start in "{raw}"', BAD_START) from None
+
+        header, _, rest = raw.partition(',')
+        self.talker = header[1:3]
+        self.msg_type = header[3:]
+        if self.nmea_type is not NMEAType.ENCAPSULATED:
             return  # silently give up - this is not invalid but we don't support it
 
+        # A bounded split leaves the checksum and any trailing receiver fields
+        # in one piece
         (
             sentence_count,
             sentence_index,
-            seq_id,
-            channel,
-            data,
-            checksum,
-        ) = fields[1:]
-
+            self.seq_id,
+            self.channel,
+            self.data,
+            tail,
+        ) = rest.split(',', 5)
         self.sentence_count = int(sentence_count)
         self.sentence_index = int(sentence_index)
-        self.seq_id = seq_id
-        self.channel = channel
-        self.data = data
-
-        self._verify(checksum)
 
-    def _verify(self, checksum: str):
+        star = len(raw) - len(tail) + tail.index('*')
+        self._verify(line, star, policy)
+
+        # Bits padding the last payload character, which are not data
+        fill = tail[:tail.index('*')]
+        if fill.isdigit() and int(fill) < 6:
+            self.fill_bits = int(fill)
+
+        # Logged lines may carry the receiver and its epoch time after the
+        # checksum, e.g. ...,0*29,rnhgb,1171830306.92
+        if len(tail) > 3:
+            self._parse_trailer(tail[tail.index('*') + 3:])
+
+    def _parse_trailer(self, trailer: str):
+        if not trailer.startswith(','):
+            return
+        receiver, _, rx_time = trailer[1:].partition(',')
+        self.receiver = receiver
+        try:
+            self.rx_time = float(rx_time.partition(',')[0])
+        except ValueError:
+            pass
+
+    def _verify(self, line: bytes, star: int, policy: str):
         # Not actually true
-        # assert checksum[:2] == '0*'
-
-        checked = (ord(c) for c in self.raw[1:].split('*', 1)[0])
-        actual = reduce(xor, checked)
-        expected = int(checksum[2:], 16)
-        assert actual == expected
-
-        assert 1 <= self.sentence_index <= self.sentence_count
-
-        if self.STRICT:
-            assert self.channel in ('A', 'B')
-            assert not ((self.sentence_count > 1) ^
-                        bool(self.seq_id))
+        # assert fill bits == '0'
+
+        if policy != NO_CHECKSUM:
+            actual = checksum(line[1:star])
+            expected = int(line[star + 1:star + 3], 16)
+            if actual != expected:
+                raise ChecksumError(f'Checksum {actual:02X} does not match {expected:02X}')
+
+        if not 1 <= self.sentence_index <= self.sentence_count:
+            raise ValidationError(
+                f'Sentence {self.sentence_index} of {self.sentence_count} is out of range', BAD_INDEX,
+            )
+
+        if policy == STRICT:
+            if self.channel not in ('A', 'B'):
+                raise ValidationError(f'Invalid channel "{self.channel}"', BAD_CHANNEL)
+            if (self.sentence_count > 1) ^ bool(self.seq_id):
+                raise ValidationError(
+                    f'Sequence ID "{self.seq_id}" does not fit a count of {self.sentence_count}', BAD_SEQ_ID,
+                )
 
     @classmethod
     def reduce(cls, messages: Sequence):
-        messages[0].bits = Bits(''.join(msg.data for msg in messages))
+        messages[0].payload = ''.join(msg.data for msg in messages)
+        # Only the last sentence of a message is padded
+        messages[0].fill_bits = messages[-1].fill_bits
         messages[0].raw = [m.raw for m in messages]
         return messages[0]
 
+    @property
+    def bits(self) -> Bits:
+        """The payload bits, converted when first needed."""
+        if self._bits is None and self.payload is not None:
+            self._bits = Bits(self.payload, self.fill_bits)
+        return self._bits
+
+    @bits.setter
+    def bits(self, bits: Bits):
+        self._bits = bits
+
     def follows(self, prev) -> bool:
         return (
             self.nmea_type == prev.nmea_type
@@ -0,0 +1,178 @@
+"""
+Decoding of large log files on several cores.
+
+The file is split into byte ranges whose boundaries fall on the start of a
+line that begins a message. Each range is decoded by a FileStream in a
+worker process. Groups of interleaved multi-sentence messages can still be
+open at the end of a range; the worker then reads on past it for the
+sentences that complete them, and the worker of the next range drops those
+as fragments without a start.
+"""
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+from itertools import chain, islice
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from .ais_message import AISMessage
+from .errors import DECODE_FAILED, InvalidLines
+from .nmea_message import POLICIES, STRICT, NMEAMessage, NMEAType
+from .stream import FileStream
+
+DEFAULT_CHUNK_SIZE = 8 << 20
+
+# Lines read past the end of a range at most, to complete the groups open
+# there
+MAX_OVERRUN_LINES = 64
+
+
+def _continues_group(line: bytes) -> bool:
+    # Whether the line is the second or later sentence of a multi-sentence
+    # message, e.g. !AIVDM,2,2,..., or a blank line that may precede one
+    line = line.strip()
+    if not line:
+        return True
+    if not line.startswith(b'!'):
+        return False
+    fields = line.split(b',', 3)
+    return len(fields) > 2 and fields[2].strip() not in (b'', b'1')
+
+
+def split_ranges(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a file into (start, stop) byte ranges of about chunk_size bytes,
+    each starting at a line that does not continue a multi-sentence message.
+    Interleaved groups may still straddle a boundary; see _finish_groups().
+    """
+    size = os.path.getsize(path)
+    if not size:
+        return []
+
+    bounds = [0]
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        pos = chunk_size
+        while pos < size:
+            # Move to the start of the next line...
+            pos = m.find(b'\n', pos - 1) + 1 or size
+
+            # ...and past any sentences continuing a group started before it
+            while pos < size:
+                end = m.find(b'\n', pos)
+                if end < 0:
+                    end = size
+                if not _continues_group(m[pos:end]):
+                    break
+                pos = end + 1
+
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+            pos += chunk_size
+
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _finish_groups(stream: FileStream, path: str, stop: int) -> Iterator[NMEAMessage]:
+    """
+    The messages of the groups still open at the end of a range, completed
+    from the sentences after it that continue them.
+    """
+    reassembler = stream.reassembler
+    groups = reassembler.groups
+    if not groups:
+        return
+
+    with FileStream(path, stop) as rest:
+        for line in islice(rest._recv_loop(), MAX_OVERRUN_LINES):
+            try:
+                msg = NMEAMessage(line, stream.policy)
+            except ValueError:
+                continue  # Counted by the worker of the next range
+            if msg.nmea_type is not NMEAType.ENCAPSULATED or msg.sentence_count == 1:
+                continue
+            key = (msg.talker, msg.channel, msg.seq_id)
+            if key not in groups:
+                continue
+            if msg.sentence_index == 1:
+                # The sequence ID is reused by a new group, so the open one
+                # will not be completed
+                del groups[key]
+            else:
+                msg = reassembler.push(msg)
+                if msg is not None:
+                    yield msg
+            if not groups:
+                return
+
+
+def _decode_range(
+    path: str, start: int, stop: int, func: Optional[Callable[[AISMessage], Any]], policy: str = STRICT,
+) -> Tuple[List[Any], Counter]:
+    """
+    Decode the AIS messages of one range; returns the results, and the
+    numbers of lines and messages that failed, by reason.
+    """
+    results = []
+    errors = InvalidLines()
+
+    with FileStream(path, start, stop, policy=policy, errors=errors) as stream:
+        for nmea in chain(stream, _finish_groups(stream, path, stream.stop)):
+            if not AISMessage.is_ais(nmea):
+                continue
+            try:
+                msg = AISMessage(nmea)
+            except Exception as e:
+                errors.add(nmea.raw, e, DECODE_FAILED)
+                continue
+            results.append(msg if func is None else func(msg))
+
+    return results, errors.counts
+
+
+def decode_file(
+    path: str,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    func: Optional[Callable[[AISMessage], Any]] = None,
+    errors: Optional[InvalidLines] = None,
+    policy: str = STRICT,
+) -> Iterator[Any]:
+    """
+    Decode the AIS messages of a log file in a pool of worker processes.
+
+    :param workers: The number of processes; defaults to the number of CPUs.
+    :param ordered: If set, results are in file order, but for messages
+                    completed past the end of a range, which come before
+                    those of the next range; otherwise they are in the order
+                    in which ranges finish, which keeps all workers busy.
+    :param func: Applied to every AISMessage within the worker, e.g. to reduce
+                 it to what the caller needs. Passing results back from the
+                 workers is costly, so this is worth doing for large files.
+                 It must be picklable, i.e. a module-level function.
+    :param errors: If given, the lines and messages that failed to parse or
+                   decode are counted into it by reason, as each range
+                   finishes. The lines themselves are not kept.
+    :param policy: The validation policy of every sentence, one of
+                   nmea_message.POLICIES.
+    :return: The results, or the AISMessages if func is not given. Lines and
+             messages that fail to parse or decode are skipped.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown validation policy "{policy}"')
+    ranges = split_ranges(path, chunk_size)
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [
+            pool.submit(_decode_range, path, start, stop, func, policy)
+            for start, stop in ranges
+        ]
+        for future in (futures if ordered else as_completed(futures)):
+            results, failures = future.result()
+            if errors is not None:
+                errors.counts.update(failures)
+            yield from results
@@ -0,0 +1,351 @@
+"""
+Threaded ingest of a network stream.
+
+Receiving, parsing and decoding run in separate threads, connected by
+bounded queues, so that a slow consumer never holds up reading the socket:
+
+    reader      one thread receiving from the socket into batches of lines
+    workers     a pool of threads parsing the lines of each batch, and
+                decoding its single-sentence AIS messages
+    consumer    the thread iterating over the pipeline, which reassembles
+                multi-sentence messages and yields messages in order
+
+When the batch queue is full, the reader either waits for the workers
+(BLOCK), which leaves the kernel and TCP flow control to buffer the feed, or
+discards the oldest queued batch (DROP_OLDEST), so that the socket is always
+drained and the latest data is kept.
+
+All state shared between messages (reassembly, duplicate suppression, the
+error channel and metrics) is only touched by the consumer thread.
+"""
+
+from queue import Empty, Full, Queue
+from socket import AF_INET, SHUT_RDWR, SOCK_STREAM, socket
+from threading import Event, Thread
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .ais_message import AISMessage
+from .dedup import DuplicateFilter
+from .errors import DECODE_FAILED, InvalidLines
+from .metrics import Metrics
+from .nmea_message import POLICIES, STRICT, NMEAMessage, NMEAType
+from .reassembly import Reassembler
+from .stream import LineBuffer
+
+# Overflow policies of the batch queue
+BLOCK = 'block'
+DROP_OLDEST = 'drop-oldest'
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST)
+
+# How often blocked threads check for shutdown, in seconds
+POLL_INTERVAL = 0.1
+
+Batch = Tuple[int, List[bytes]]
+
+
+class Failure(NamedTuple):
+    """A line that failed to parse, or a message that failed to decode."""
+    line: Any
+    error: Exception
+    reason: Optional[str]
+
+
+class Pipeline:
+    """
+    NMEA0183 messages of a TCP feed, received and decoded in background
+    threads:
+
+        with Pipeline(workers=2, overflow=DROP_OLDEST) as p:
+            for msg in p:
+                ...
+
+    Iteration yields an AISMessage for every AIS message, or what func
+    returns for it if given, and the NMEAMessage of any other sentence, in
+    the order received. Lines and messages that fail to parse or decode, or
+    for which func raises, never interrupt iteration; they are recorded in
+    errors. Iteration ends once the peer closes the connection and everything
+    received has been yielded, or once the pipeline is closed. Should a
+    background thread fail nonetheless, the pipeline stops and iteration
+    raises a RuntimeError.
+    """
+
+    def __init__(
+        self,
+        host: str = 'ais.exploratorium.edu',
+        port: int = 80,
+        workers: int = 2,
+        max_batches: int = 256,
+        overflow: str = BLOCK,
+        buf_size: int = 65536,
+        policy: str = STRICT,
+        func: Optional[Callable[[AISMessage], Any]] = None,
+        dedup: Optional[DuplicateFilter] = None,
+        errors: Optional[InvalidLines] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        :param workers: The number of parsing and decoding threads.
+        :param max_batches: Capacity of each of the batch queue, between the
+                            reader and the workers, and the result queue,
+                            between the workers and the consumer. A batch is
+                            the lines of one receive, of up to buf_size bytes.
+        :param overflow: BLOCK or DROP_OLDEST; what the reader does when the
+                         batch queue is full.
+        :param func: Applied to every AISMessage within the workers.
+        :param errors: The error channel; one is created if not given.
+        :param metrics: If given, the queue depths and drop counts are
+                        included in its snapshots as 'pipeline'.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy "{overflow}"')
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown validation policy "{policy}"')
+        if workers < 1:
+            raise ValueError('A pipeline needs at least one worker')
+
+        self.overflow = overflow
+        self.buf_size = buf_size
+        self.policy = policy
+        self.func = func
+        self.dedup = dedup
+        self.errors = InvalidLines() if errors is None else errors
+        self.metrics = metrics
+        self.reassembler = Reassembler()
+
+        self.batches: 'Queue[Optional[Batch]]' = Queue(max_batches)
+        self.results: 'Queue[Tuple[int, list]]' = Queue(max_batches)
+        # Sequence numbers of batches dropped from the batch queue
+        self.dropped: Set[int] = set()
+        self._stop = Event()
+        # The number of batches received, once the connection has closed
+        self._total: Optional[int] = None
+        # The exception that ended a reader or worker thread, if any
+        self._fatal: Optional[BaseException] = None
+
+        # Counters, each written by one thread only
+        self.received_batches = 0
+        self.received_lines = 0
+        self.dropped_batches = 0
+        self.dropped_lines = 0
+        self.max_depth = 0
+
+        if metrics is not None:
+            metrics.watch('pipeline', self.stats)
+            metrics.watch('invalid', self.errors.stats)
+            if dedup is not None:
+                metrics.watch('dedup', dedup.stats)
+
+        self.sock = socket(AF_INET, SOCK_STREAM)
+        self.sock.connect((host, port))
+
+        self.threads = [Thread(target=self._run, args=(self._read,), name='pyais-reader', daemon=True)] + [
+            Thread(target=self._run, args=(self._work,), name=f'pyais-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self, timeout: Optional[float] = None):
+        """Stop all threads, discarding whatever has not been yielded yet."""
+        self._stop.set()
+        try:
+            # Wake the reader from a blocking receive
+            self.sock.shutdown(SHUT_RDWR)
+        except OSError:
+            pass  # Not connected anymore
+        for thread in self.threads:
+            thread.join(timeout)
+        self.sock.close()
+
+    def stats(self) -> dict:
+        return {
+            'batch_queue_depth': self.batches.qsize(),
+            'result_queue_depth': self.results.qsize(),
+            'max_batch_queue_depth': self.max_depth,
+            'received_batches': self.received_batches,
+            'received_lines': self.received_lines,
+            'dropped_batches': self.dropped_batches,
+            'dropped_lines': self.dropped_lines,
+        }
+
+    def _put(self, q: Queue, item) -> bool:
+        """Put an item, waiting for room; returns False if stopped first."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=POLL_INTERVAL)
+                return True
+            except Full:
+                pass
+        return False
+
+    def _run(self, target: Callable[[], None]):
+        # A thread that dies would leave the consumer waiting for its batch
+        # forever, so the whole pipeline stops, and iteration re-raises
+        try:
+            target()
+        except BaseException as e:
+            self._fatal = e
+            self._stop.set()
+
+    def _read(self):
+        buffer = LineBuffer(self.buf_size)
+        recv = buffer.recv
+        sock = self.sock
+        batches = self.batches
+        drop = self.overflow == DROP_OLDEST
+        seq = 0
+
+        while not self._stop.is_set():
+            try:
+                lines = recv(sock)
+            except OSError:
+                lines = None  # Connection reset, or shut down by close()
+            closed = lines is None
+            if closed:
+                # A final unterminated line is still a line
+                line = buffer.rest()
+                lines = [line] if line else []
+
+            if lines:
+                batch = (seq, lines)
+                seq += 1
+                self.received_batches += 1
+                self.received_lines += len(lines)
+                if drop:
+                    while True:
+                        try:
+                            batches.put_nowait(batch)
+                            break
+                        except Full:
+                            pass
+                        try:
+                            old_seq, old_lines = batches.get_nowait()
+                        except Empty:
+                            continue  # Taken by a worker meanwhile
+                        self.dropped.add(old_seq)
+                        self.dropped_batches += 1
+                        self.dropped_lines += len(old_lines)
+                elif not self._put(batches, batch):
+                    return
+                self.max_depth = max(self.max_depth, batches.qsize())
+            if closed:
+                break
+
+        self._total = seq
+        # One end marker per worker
+        for _ in self.threads[1:]:
+            if not self._put(batches, None):
+                return
+
+    def _work(self):
+        batches = self.batches
+        while not self._stop.is_set():
+            try:
+                batch = batches.get(timeout=POLL_INTERVAL)
+            except Empty:
+                continue
+            if batch is None:
+                return
+            seq, lines = batch
+            if not self._put(self.results, (seq, self._process(lines))):
+                return
+
+    def _process(self, lines: List[bytes]) -> list:
+        """
+        Parse lines, and decode the single-sentence AIS messages among them.
+        Returns AISMessages (or func results), NMEAMessages of other
+        sentences and of fragments, and Failures, in order.
+        """
+        policy = self.policy
+        func = self.func
+        items = []
+        for line in lines:
+            try:
+                nmea = NMEAMessage(line, policy)
+            except Exception as e:
+                items.append(Failure(line, e, None))
+                continue
+            if nmea.nmea_type is NMEAType.ENCAPSULATED and nmea.sentence_count == 1:
+                nmea = NMEAMessage.reduce([nmea])
+                if AISMessage.is_ais(nmea):
+                    if self.dedup is not None:
+                        # Left to the consumer thread, before decoding
+                        items.append(nmea)
+                        continue
+                    try:
+                        msg = AISMessage(nmea)
+                        items.append(msg if func is None else func(msg))
+                    except Exception as e:
+                        items.append(Failure(nmea.raw, e, DECODE_FAILED))
+                    continue
+            items.append(nmea)
+        return items
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._msg_loop()
+
+    def _msg_loop(self) -> Iterator[Any]:
+        results = self.results
+        dropped = self.dropped
+        pending = {}
+        next_seq = 0
+
+        while not self._stop.is_set():
+            if next_seq in pending:
+                yield from self._complete(pending.pop(next_seq))
+                next_seq += 1
+            elif next_seq in dropped:
+                dropped.discard(next_seq)
+                next_seq += 1
+            elif self._total is not None and next_seq >= self._total:
+                return
+            else:
+                try:
+                    seq, items = results.get(timeout=POLL_INTERVAL)
+                except Empty:
+                    continue
+                pending[seq] = items
+
+        if self._fatal is not None:
+            raise RuntimeError('A pipeline thread failed') from self._fatal
+
+    def _complete(self, items: list) -> Iterator[Any]:
+        # Reassembly, and whatever else needs the state of earlier messages
+        errors = self.errors
+        dedup = self.dedup
+        for item in items:
+            if type(item) is Failure:
+                errors.add(*item)
+                continue
+            if type(item) is not NMEAMessage:
+                yield item
+                continue
+
+            nmea = item
+            if nmea.nmea_type is not NMEAType.ENCAPSULATED:
+                yield nmea
+                continue
+            if nmea.payload is None:
+                # A fragment
+                nmea = self.reassembler.push(nmea)
+                if nmea is None:
+                    continue
+            if not AISMessage.is_ais(nmea):
+                yield nmea
+                continue
+            if dedup is not None and dedup.is_duplicate(nmea.payload, nmea.rx_time):
+                continue
+            try:
+                msg = AISMessage(nmea)
+                if self.func is not None:
+                    msg = self.func(msg)
+            except Exception as e:
+                errors.add(nmea.raw, e, DECODE_FAILED)
+                continue
+            yield msg
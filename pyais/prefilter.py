@@ -0,0 +1,66 @@
+from typing import Iterable, Optional, Tuple
+
+from .bits import ASCII6_TO_BIN, ASCII6_TO_INT
+
+
+def header(payload: str) -> Tuple[int, int, int]:
+    """
+    The message type, repeat indicator and MMSI of an armored payload, read
+    from its first seven characters (the first 38 bits) only.
+    """
+    try:
+        value = int(payload[:7].ljust(7, '0').translate(ASCII6_TO_BIN), 2)
+    except ValueError:
+        raise ValueError(f'Invalid payload "{payload}"') from None
+    return value >> 36, value >> 34 & 0x3, value >> 4 & 0x3FFFFFFF
+
+
+class HeaderFilter:
+    """
+    Selection of messages by type and MMSI, before their payload is decoded.
+
+    The type is the first armored character alone, so it is checked by set
+    membership on that character; only messages of a wanted type have their
+    MMSI read, with header(). Payloads that are not valid
+    armoring are rejected.
+    """
+
+    def __init__(self, types: Optional[Iterable[int]] = None, mmsis: Optional[Iterable[int]] = None):
+        """
+        :param types: Message types to keep, or None for all.
+        :param mmsis: MMSIs to keep, or None for all.
+        """
+        self.types = None if types is None else frozenset(types)
+        self.mmsis = None if mmsis is None else frozenset(mmsis)
+
+        # First payload characters of the wanted types
+        self._chars = None if types is None else frozenset(
+            chr(c) for c, v in enumerate(ASCII6_TO_INT)
+            if v is not None and v in self.types
+        )
+
+        self.passed = 0
+        self.rejected = 0
+
+    def matches(self, payload: str) -> bool:
+        if not payload or (self._chars is not None and payload[0] not in self._chars):
+            self.rejected += 1
+            return False
+
+        if self.mmsis is not None:
+            try:
+                mmsi = header(payload)[2] if len(payload) >= 7 else None
+            except ValueError:
+                mmsi = None
+            if mmsi not in self.mmsis:
+                self.rejected += 1
+                return False
+
+        self.passed += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'passed': self.passed,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, List, Optional, Tuple
+
+from .nmea_message import NMEAMessage
+
+GroupKey = Tuple[str, str, str]
+
+
+class Reassembler:
+    """
+    Reassembly of multi-sentence messages. Groups are keyed by
+    (talker, channel, seq_id), so that several groups can be in flight at
+    once, as happens when type 5 and type 19/24 fragments interleave.
+
+    Incomplete groups are evicted once older than max_age seconds, or oldest
+    first once more than max_groups are in flight, so memory is bounded.
+    """
+
+    def __init__(
+        self,
+        max_groups: int = 64,
+        max_age: float = 10,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_groups = max_groups
+        self.max_age = max_age
+        self.clock = clock
+
+        # Key -> (start time, fragments), oldest first
+        self.groups: 'OrderedDict[GroupKey, Tuple[float, List[NMEAMessage]]]' = OrderedDict()
+
+        # Messages reassembled from more than one sentence
+        self.completed = 0
+        # Fragments of groups evicted for their age
+        self.expired = 0
+        # Fragments discarded for capacity, or because they did not fit in
+        # their group
+        self.dropped = 0
+
+    def push(self, msg: NMEAMessage) -> Optional[NMEAMessage]:
+        """
+        Add one encapsulated sentence, and return the message it completes,
+        if any.
+        """
+        if msg.sentence_count == 1:
+            # Under a lenient policy, possibly with a sequence ID
+            return NMEAMessage.reduce([msg])
+        # Multi-sentence messages without a sequence ID, which a lenient
+        # policy lets through, are grouped under the empty one
+
+        now = self.clock()
+        self._expire(now)
+
+        key = (msg.talker, msg.channel, msg.seq_id)
+        group = self.groups.get(key)
+
+        if msg.sentence_index == 1:
+            if group is not None:
+                # Superseded by a new group with the same sequence ID
+                self.dropped += len(group[1])
+                del self.groups[key]
+            fragments = [msg]
+            self.groups[key] = (now, fragments)
+            if len(self.groups) > self.max_groups:
+                _, (_, oldest) = self.groups.popitem(last=False)
+                self.dropped += len(oldest)
+        elif group is None:
+            self.dropped += 1  # Its first sentence was never seen, or evicted
+            return None
+        else:
+            fragments = group[1]
+            if not msg.follows(fragments[-1]):
+                self.dropped += len(fragments) + 1
+                del self.groups[key]
+                return None
+            fragments.append(msg)
+
+        if msg.sentence_index == msg.sentence_count:
+            del self.groups[key]
+            self.completed += 1
+            return NMEAMessage.reduce(fragments)
+        return None
+
+    def _expire(self, now: float):
+        limit = now - self.max_age
+        groups = self.groups
+        while groups:
+            key, (started, fragments) = next(iter(groups.items()))
+            if started >= limit:
+                break
+            del groups[key]
+            self.expired += len(fragments)
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self.groups),
+            'completed': self.completed,
+            'expired': self.expired,
+            'dropped': self.dropped,
+        }
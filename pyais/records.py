@@ -0,0 +1,133 @@
+"""
+Compact record types for decoded messages.
+
+A decoded dict of some 20 keys takes several times the memory of its values;
+when millions of messages are held at once, that overhead dominates. Every
+message type with a field table therefore also has a record class: a named
+tuple of its fields, whose decoder builds the record directly. Records can
+be read like the decoded dicts, by key, as well as by attribute.
+"""
+
+from collections import namedtuple
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from . import ais
+from .ais import static
+from .bits import Bits
+from .nmea_message import NMEAMessage
+from .schema import COOKED, RAW, Field, compile_decoder, field_names
+
+
+class RecordMixin:
+    """
+    Dict-like reads of a named tuple: record['mmsi'], record.get('mmsi') and
+    'mmsi' in record look up fields by name. Iteration and len() remain those
+    of the tuple, i.e. of the values.
+    """
+
+    __slots__ = ()
+
+    _index: Dict[str, int] = {}
+    msg_type: int = 0
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._index.get(key)
+        return default if i is None else tuple.__getitem__(self, i)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+
+def make_record_class(name: str, fields: Sequence[Field], msg_type: int, profile: str = COOKED) -> type:
+    names = field_names(fields, profile)
+    base = namedtuple(name, names)
+    return type(name, (RecordMixin, base), {
+        '__slots__': (),
+        '_index': {key: i for i, key in enumerate(names)},
+        'msg_type': msg_type,
+    })
+
+
+RecordDecoder = Callable[[Bits, Optional[float]], tuple]
+
+# (message type, profile) -> (field table, record class, decoder), compiled
+# on first use
+_compiled: Dict[Tuple[int, str], Tuple[Sequence[Field], type, RecordDecoder]] = {}
+
+Type24A = make_record_class('Type24A', static.FIELDS_A, 24)
+Type24B = make_record_class('Type24B', static.FIELDS_B, 24)
+Type24ARaw = make_record_class('Type24ARaw', static.FIELDS_A, 24, RAW)
+Type24BRaw = make_record_class('Type24BRaw', static.FIELDS_B, 24, RAW)
+_decode_24 = {
+    COOKED: (
+        compile_decoder(static.FIELDS_A, name='decode_a', into=Type24A),
+        compile_decoder(static.FIELDS_B, name='decode_b', into=Type24B),
+    ),
+    RAW: (
+        compile_decoder(static.FIELDS_A, name='decode_a', into=Type24ARaw, profile=RAW),
+        compile_decoder(static.FIELDS_B, name='decode_b', into=Type24BRaw, profile=RAW),
+    ),
+}
+
+
+def _compile(msg_type: int, profile: str) -> Optional[Tuple[Sequence[Field], type, RecordDecoder]]:
+    fields = ais.FIELDS.get(msg_type)
+    compiled = _compiled.get((msg_type, profile))
+    if compiled is None or compiled[0] is not fields:
+        # Not compiled yet, or the field table was registered anew
+        if fields is None:
+            return None
+        suffix = 'Raw' if profile == RAW else ''
+        cls = make_record_class(f'Type{msg_type}{suffix}', fields, msg_type, profile)
+        # Exact tables, such as that of types 1-3, are decoded leniently;
+        # records are for holding data, not for validating it
+        decoder = compile_decoder(fields, name='decode', into=cls, profile=profile)
+        compiled = _compiled[msg_type, profile] = (fields, cls, decoder)
+    return compiled
+
+
+def record_class(msg_type: int, profile: str = COOKED) -> Optional[type]:
+    """The record class of a message type, or None if it has no field table."""
+    if msg_type == 24:
+        raise ValueError('Type 24 has a record class per part, e.g. Type24A and Type24B')
+    compiled = _compile(msg_type, profile)
+    return None if compiled is None else compiled[1]
+
+
+def decode_record(bits: Bits, ref_time: Optional[float] = None, profile: str = COOKED) -> Optional[tuple]:
+    """
+    Decode a payload into the record of its message type, or None if the
+    type has no field table.
+    """
+    msg_type = bits.uint_at(0, 6)
+    if msg_type == 24:
+        part_num = bits.uint_at(38, 2)
+        if part_num > 1:
+            raise ValueError(f'Invalid type 24 part number {part_num}')
+        return _decode_24[profile][part_num](bits, ref_time)
+    compiled = _compile(msg_type, profile)
+    return None if compiled is None else compiled[2](bits, ref_time)
+
+
+def to_record(nmea: NMEAMessage, ref_time: Optional[float] = None, profile: str = COOKED) -> Optional[tuple]:
+    """
+    Decode a complete message into a record. The record holds no reference
+    to the message, so the sentence and its bits can be freed.
+    """
+    if ref_time is None:
+        ref_time = nmea.rx_time
+    return decode_record(nmea.bits, ref_time, profile)
@@ -0,0 +1,319 @@
+"""
+Declarative AIS message layouts.
+
+Each message type is described as an ordered table of fields, starting at
+bit 0 of the payload (the message type itself). The table is compiled once,
+at import time, into a single generated function that pulls every field out
+of the payload integer held by Bits with precomputed shifts and masks.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from bitarray import bitarray
+
+from .bits import Bits, spread6
+
+# Six-bit value -> character for AIS text fields
+ASCII6_TEXT = ''.join(chr(c + 0x40 if c < 0x20 else c) for c in range(0x40))
+
+# The same, as a bytes.translate() table
+TEXT_TABLE = ASCII6_TEXT.encode('ascii').ljust(0x100, b'?')
+
+
+class Field(NamedTuple):
+    # The key in the decoded dict; a tuple of keys if the converter returns
+    # one value per key, or None for bits that are skipped (type, spare)
+    name: Union[str, Tuple[str, ...], None]
+
+    # The width in bits; None for a variable-width final field that takes
+    # the rest of the payload
+    width: Optional[int]
+
+    signed: bool = False
+
+    # Called with the (possibly signed) integer value of the field
+    convert: Optional[Callable] = None
+
+
+def text(value: int, width: int) -> str:
+    """
+    Six-bit ASCII text, terminated by the first '@' and with trailing
+    spaces removed.
+    """
+    n = width // 6
+    chars = spread6(value >> (width - 6*n), n).translate(TEXT_TABLE)
+    return chars.split(b'@', 1)[0].rstrip(b' ').decode('ascii')
+
+
+def texts(values: Sequence[int], width: int) -> List[str]:
+    """
+    text() of many values of the same width, e.g. the names of a batch of
+    messages. All characters are translated and decoded in one go, and only
+    the '@' cut and space trimming are done per value.
+    """
+    n = width // 6
+    if not n:
+        return [''] * len(values)
+    pad = width - 6*n
+    chars = b''.join([spread6(value >> pad, n) for value in values]).translate(TEXT_TABLE).decode('ascii')
+    return [chars[i:i + n].split('@', 1)[0].rstrip(' ') for i in range(0, len(chars), n)]
+
+
+def raw(value: int, width: int) -> bitarray:
+    return bitarray(format(value, f'0{width}b')) if width else bitarray()
+
+
+# Converters that are called with (value, width) rather than just (value)
+WIDTH_CONVERTERS = (text, raw)
+
+# Decode profiles: 'cooked' values are converted to enums, floats in
+# natural units, datetimes and so on; 'raw' values are the plain integers
+# (and bools and text) as transmitted
+COOKED = 'cooked'
+RAW = 'raw'
+PROFILES = (COOKED, RAW)
+
+# Fields of up to this many bits have their converter applied to every
+# possible value when the decoder is compiled, so that decoding is a lookup
+MAX_TABLE_BITS = 12
+
+# Table entry for values that the converter rejects
+_INVALID = object()
+
+
+def uses_ref_time(convert: Callable) -> Callable:
+    """
+    Mark a converter as one that is called with (value, ref_time), where
+    ref_time is the reference time passed to the decoder: epoch seconds or
+    None.
+    """
+    convert.uses_ref_time = True
+    return convert
+
+
+def raw_name(name: str) -> Callable[[Callable], Callable]:
+    """
+    Name the key of fields with this converter in the raw profile, where the
+    value is not converted and so should not carry a unit in its name, e.g.
+    'lat' instead of 'lat_deg'.
+    """
+    def mark(convert: Callable) -> Callable:
+        convert.raw_name = name
+        return convert
+    return mark
+
+
+def _raw_key(field: Field) -> str:
+    name = getattr(field.convert, 'raw_name', None)
+    if name is None:
+        if isinstance(field.name, tuple):
+            raise ValueError(f'The converter of {field.name} has no raw name')
+        name = field.name
+    return name
+
+
+def _lookup_table(convert: Callable, width: int, signed: bool) -> tuple:
+    # Indexed by the (possibly negative) field value
+    table = []
+    for x in range(1 << width):
+        if signed and x >= 1 << (width - 1):
+            x -= 1 << width
+        try:
+            table.append(convert(x))
+        except Exception:
+            table.append(_INVALID)
+    return tuple(table)
+
+
+def compile_decoder(
+    fields: Sequence[Field],
+    exact: bool = False,
+    name: str = 'decode',
+    into: Optional[Callable] = None,
+    profile: str = COOKED,
+) -> Callable[[Bits, Optional[float]], Dict]:
+    """
+    Generate a decoder for a field table.
+
+    Payloads shorter than the table are padded with zero bits. Longer
+    payloads have their extra bits ignored, unless exact is set, in which
+    case they are rejected.
+
+    Converters of fields of up to MAX_TABLE_BITS bits are replaced by lookup
+    tables of their results, so they must be pure functions of the value.
+
+    :param into: If given, the decoder returns into(*values), with the values
+                 of all keys in table order, instead of a dict.
+    :param profile: COOKED or RAW. The raw profile skips all converters but
+                    text, and bool for single bits.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown decode profile "{profile}"')
+    total = sum(f.width for f in fields if f.width is not None)
+    variable = fields[-1].width is None
+    if any(f.width is None for f in fields[:-1]):
+        raise ValueError('Only the final field can have a variable width')
+
+    namespace = {}
+    lines = [
+        f'def {name}(bits, ref_time=None):',
+        '    v = bits.value',
+        '    n = bits.length',
+        f'    if n < {total}:',
+        f'        v <<= {total} - n',
+        f'        n = {total}',
+    ]
+    if exact:
+        lines += [
+            f'    elif n > {total}:',
+            f"        raise ValueError(f'{{n - {total}}} bits left after decoding')",
+        ]
+    elif not variable:
+        lines += [
+            f'    elif n > {total}:',
+            f'        v >>= n - {total}',
+        ]
+
+    items = []
+    offset = 0
+    for i, field in enumerate(fields):
+        if field.width is None:
+            if field.name is None:
+                continue
+            width = f'(n - {offset})'
+            lines.append(f'    x = v & ((1 << {width}) - 1)')
+        else:
+            width = field.width
+            offset += width
+            if field.name is None:
+                continue
+            shift = f'(n - {offset})' if variable else total - offset
+            lines.append(f'    x = (v >> {shift}) & {(1 << width) - 1:#x}')
+
+        if field.signed:
+            lines.append(f'    if x >= 1 << ({width} - 1): x -= 1 << {width}')
+
+        convert = field.convert
+        key = field.name
+        if profile == RAW:
+            key = _raw_key(field)
+            if convert not in (bool, text):
+                convert = None
+
+        if convert is None:
+            expr = 'x'
+        elif convert is bool:
+            expr = 'x != 0'
+        elif (
+            field.width is not None and field.width <= MAX_TABLE_BITS
+            and convert not in WIDTH_CONVERTERS
+            and not getattr(convert, 'uses_ref_time', False)
+        ):
+            # Look the result up, and only call the converter for values it
+            # rejects, so that it raises as it would have
+            namespace[f't{i}'] = _lookup_table(convert, width, field.signed)
+            namespace[f'c{i}'] = convert
+            lines.append(f'    y = t{i}[x]')
+            lines.append(f'    if y is _INVALID: y = c{i}(x)')
+            namespace['_INVALID'] = _INVALID
+            expr = 'y'
+        else:
+            namespace[f'c{i}'] = convert
+            if convert in WIDTH_CONVERTERS:
+                expr = f'c{i}(x, {width})'
+            elif getattr(convert, 'uses_ref_time', False):
+                expr = f'c{i}(x, ref_time)'
+            else:
+                expr = f'c{i}(x)'
+
+        if isinstance(key, tuple):
+            targets = [f'f{i}_{j}' for j in range(len(key))]
+            lines.append(f'    {", ".join(targets)} = {expr}')
+            items += zip(key, targets)
+        else:
+            lines.append(f'    f{i} = {expr}')
+            items.append((key, f'f{i}'))
+
+    if into is None:
+        lines.append('    return {')
+        lines += [f'        {key!r}: {local},' for key, local in items]
+        lines.append('    }')
+    else:
+        namespace['_into'] = into
+        lines.append(f'    return _into({", ".join(local for _, local in items)})')
+
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+def field_names(fields: Sequence[Field], profile: str = COOKED) -> Tuple[str, ...]:
+    """The keys decoded from a field table, in order."""
+    names = []
+    for field in fields:
+        if field.name is not None and profile == RAW:
+            names.append(_raw_key(field))
+        elif isinstance(field.name, tuple):
+            names += field.name
+        elif field.name is not None:
+            names.append(field.name)
+    return tuple(names)
+
+
+def compile_getters(
+    fields: Sequence[Field], profile: str = COOKED,
+) -> Dict[str, Callable[[Bits, Optional[float]], Dict]]:
+    """
+    Generate one decoder per field, for decoding fields on demand. The result
+    maps every key to the decoder of its field; each decoder returns a dict
+    with all of the keys of that field.
+    """
+    getters = {}
+    for field in fields:
+        if field.name is None:
+            continue
+        only = tuple(f if f is field else f._replace(name=None) for f in fields)
+        getter = compile_decoder(only, name='get', profile=profile)
+        for key in field_names((field,), profile):
+            getters[key] = getter
+    return getters
+
+
+class LazyFields(Mapping):
+    """
+    A read-only mapping of decoded fields that decodes each field the first
+    time it is accessed, and caches the result.
+    """
+
+    __slots__ = ('bits', 'getters', 'ref_time', 'cache')
+
+    def __init__(
+        self,
+        bits: Bits,
+        getters: Dict[str, Callable[[Bits, Optional[float]], Dict]],
+        ref_time: Optional[float] = None,
+    ):
+        self.bits = bits
+        self.getters = getters
+        self.ref_time = ref_time
+        self.cache = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        self.cache.update(self.getters[key](self.bits, self.ref_time))
+        return self.cache[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.getters
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.getters)
+
+    def __len__(self) -> int:
+        return len(self.getters)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
@@ -0,0 +1,221 @@
+"""
+Synthetic AIS traffic, for load testing decoders and stream consumers.
+
+Run with ``python -m pyais.simulate``, e.g. to write a million sentences of
+1000 vessels to a file:
+
+    python -m pyais.simulate -n 1000 -c 1000000 -o traffic.nmea
+
+or to serve them to one TCP client, or send them as UDP datagrams, with
+--tcp PORT or --udp HOST:PORT.
+"""
+
+import random
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from itertools import islice
+from math import cos, radians, sin
+from socket import AF_INET, SOCK_DGRAM, SOCK_STREAM, socket
+from time import time
+from typing import Iterator, List, Optional, Tuple
+
+from .ais.pos_class_a1 import NavigationStatus, TimeMode
+from .encode import Encoder
+
+# Sentences written or sent at a time
+BATCH = 4096
+
+_PORTS = ('USLGB', 'NLRTM', 'SGSIN', 'CNSHA', 'DEHAM', 'BEANR', 'USNYC', 'JPTYO')
+_NAMES = ('OCEAN', 'STAR', 'EXPRESS', 'SPIRIT', 'PIONEER', 'VOYAGER', 'TRADER', 'GLORY')
+
+
+class SimulatedVessel:
+    __slots__ = (
+        'mmsi', 'lat', 'lon', 'speed', 'course', 'turn', 'status', 'updated',
+        'shipname', 'callsign', 'ship_type', 'destination', 'static_due',
+    )
+
+    def __init__(self, rng: random.Random, center: Tuple[float, float], spread: float, now: float):
+        self.mmsi = rng.randrange(200_000_000, 800_000_000)
+        self.lat = center[0] + rng.uniform(-spread, spread)
+        self.lon = center[1] + rng.uniform(-spread, spread)
+        moored = rng.random() < 0.2
+        self.speed = 0.0 if moored else rng.uniform(5, 22)
+        self.status = NavigationStatus.MOORED if moored else NavigationStatus.USING_ENGINE
+        self.course = rng.uniform(0, 360)
+        self.turn = 0.0  # degrees per second
+        self.updated = now
+
+        self.shipname = f'{rng.choice(_NAMES)} {rng.choice(_NAMES)} {rng.randrange(1, 99)}'
+        self.callsign = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') for _ in range(5))
+        self.ship_type = rng.choice((30, 52, 60, 70, 71, 80, 89))
+        self.destination = rng.choice(_PORTS)
+        self.static_due = now + rng.uniform(0, 360)
+
+    def move(self, now: float, rng: random.Random):
+        """Advance to now, along a gently and randomly turning course."""
+        dt = now - self.updated
+        self.updated = now
+        if not self.speed:
+            return
+
+        if rng.random() < 0.05:
+            self.turn = rng.uniform(-0.5, 0.5)
+        self.course = (self.course + self.turn * dt) % 360
+
+        # Nautical miles, and one minute of latitude per nautical mile
+        distance = self.speed * dt / 3600
+        course = radians(self.course)
+        self.lat += distance * cos(course) / 60
+        self.lon += distance * sin(course) / (60 * max(cos(radians(self.lat)), 0.01))
+        if not -85 < self.lat < 85:
+            # Turn back from the poles
+            self.lat = max(min(self.lat, 85), -85)
+            self.course = (180 - self.course) % 360
+        self.lon = (self.lon + 180) % 360 - 180
+
+    def position_report(self, now: float) -> dict:
+        turn_dps = self.turn
+        return {
+            'mmsi': self.mmsi,
+            'status': self.status,
+            'turn_indicate_avail': True,
+            'turn_min_dps': turn_dps,
+            'turn_max_dps': turn_dps,
+            'speed_knots': round(self.speed, 1),
+            'accuracy_sub_10m': True,
+            'long_deg': self.lon,
+            'lat_deg': self.lat,
+            'course_deg': round(self.course, 1) % 360,
+            'heading_deg': round(self.course) % 360,
+            'time_mode': TimeMode.EPFS,
+            'time': datetime.fromtimestamp(now, timezone.utc),
+        }
+
+    def static_report(self, now: float) -> dict:
+        eta = datetime.fromtimestamp(now + 86400 * 3, timezone.utc)
+        return {
+            'mmsi': self.mmsi,
+            'imo': self.mmsi % 10_000_000,
+            'callsign': self.callsign,
+            'shipname': self.shipname,
+            'ship_type': self.ship_type,
+            'to_bow': 150,
+            'to_stern': 40,
+            'to_port': 15,
+            'to_starboard': 15,
+            'epfd': 1,
+            'eta_month': eta.month,
+            'eta_day': eta.day,
+            'eta_hour': eta.hour,
+            'eta_minute': eta.minute,
+            'draught_m': 9.5,
+            'destination': self.destination,
+        }
+
+
+class TrafficGenerator:
+    """
+    Simulates a fleet of vessels, each sending a position report (type 1)
+    every report_interval seconds and static and voyage data (type 5, two
+    sentences) every static_interval seconds, in simulated time.
+    """
+
+    def __init__(
+        self,
+        vessels: int = 1000,
+        center: Tuple[float, float] = (37.8, -122.4),
+        spread: float = 1.0,
+        report_interval: float = 10.0,
+        static_interval: float = 360.0,
+        start_time: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param center: Latitude and longitude around which vessels start.
+        :param spread: Greatest start distance from center, in degrees.
+        :param seed: For a reproducible sequence of sentences.
+        """
+        self.rng = random.Random(seed)
+        self.now = time() if start_time is None else start_time
+        self.report_interval = report_interval
+        self.static_interval = static_interval
+        self.vessels: List[SimulatedVessel] = [
+            SimulatedVessel(self.rng, center, spread, self.now) for _ in range(vessels)
+        ]
+        self.channels = (Encoder(channel='A'), Encoder(channel='B'))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.sentences()
+
+    def sentences(self) -> Iterator[str]:
+        """Sentences without end, in the order they are sent."""
+        rng = self.rng
+        vessels = self.vessels
+        step = self.report_interval / max(len(vessels), 1)
+        channels = self.channels
+
+        while True:
+            for i, vessel in enumerate(vessels):
+                self.now += step
+                now = self.now
+                vessel.move(now, rng)
+                encoder = channels[i & 1]
+                yield from encoder.encode(1, vessel.position_report(now))
+                if now >= vessel.static_due:
+                    vessel.static_due = now + self.static_interval
+                    yield from encoder.encode(5, vessel.static_report(now))
+
+    def batches(self, count: int) -> Iterator[bytes]:
+        """count sentences as lines, BATCH at a time."""
+        it = self.sentences()
+        while count > 0:
+            lines = list(islice(it, min(count, BATCH)))
+            count -= len(lines)
+            yield ('\n'.join(lines) + '\n').encode('ascii')
+
+    def write(self, path: str, count: int):
+        with open(path, 'wb') as f:
+            for batch in self.batches(count):
+                f.write(batch)
+
+    def serve_tcp(self, port: int, count: int, host: str = '127.0.0.1'):
+        """Wait for one client to connect, and send it count sentences."""
+        with socket(AF_INET, SOCK_STREAM) as server:
+            server.bind((host, port))
+            server.listen(1)
+            conn, _ = server.accept()
+            with conn:
+                for batch in self.batches(count):
+                    conn.sendall(batch)
+
+    def send_udp(self, host: str, port: int, count: int):
+        """Send count sentences, one datagram each."""
+        with socket(AF_INET, SOCK_DGRAM) as sock:
+            for line in islice(self.sentences(), count):
+                sock.sendto(line.encode('ascii') + b'\r\n', (host, port))
+
+
+def main():
+    parser = ArgumentParser(prog='python -m pyais.simulate', description='Generate synthetic AIS traffic')
+    parser.add_argument('-n', '--vessels', type=int, default=1000, help='number of simulated vessels')
+    parser.add_argument('-c', '--count', type=int, default=100_000, help='number of sentences')
+    parser.add_argument('--seed', type=int, help='random seed, for reproducible traffic')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('-o', '--output', help='write the sentences to this file')
+    output.add_argument('--tcp', type=int, metavar='PORT', help='serve the sentences to one client on this local port')
+    output.add_argument('--udp', metavar='HOST:PORT', help='send the sentences as datagrams to this address')
+    args = parser.parse_args()
+
+    generator = TrafficGenerator(args.vessels, seed=args.seed)
+    if args.output:
+        generator.write(args.output, args.count)
+    elif args.tcp:
+        generator.serve_tcp(args.tcp, args.count)
+    else:
+        host, _, port = args.udp.rpartition(':')
+        generator.send_udp(host, int(port), args.count)
+
+
+if __name__ == '__main__':
+    main()
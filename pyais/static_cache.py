@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from sys import intern
+from time import monotonic
+from typing import Callable, Optional
+
+from .ais_message import AISMessage
+
+# Message types whose static data is cached, and those that are enriched
+STATIC_TYPES = frozenset((5, 24))
+POSITION_TYPES = frozenset((1, 2, 3, 18, 19, 27))
+
+# Static fields taken from type 5 and 24 messages. Text fields are interned,
+# as most ship names, call signs and destinations recur across messages.
+TEXT_KEYS = ('shipname', 'callsign', 'destination')
+INT_KEYS = ('imo', 'ship_type', 'to_bow', 'to_stern', 'to_port', 'to_starboard')
+
+
+class StaticData:
+    """
+    The static and voyage data last reported by a vessel. Fields that no
+    message has reported yet are None; type 24 part A reports only the name,
+    part B the rest but the IMO number, destination and draught.
+    """
+
+    __slots__ = ('mmsi', 'updated', 'draught') + TEXT_KEYS + INT_KEYS
+
+    def __init__(self, mmsi: int):
+        self.mmsi = mmsi
+        self.updated = 0.0
+        self.draught = None
+        for key in TEXT_KEYS + INT_KEYS:
+            setattr(self, key, None)
+
+    def __repr__(self):
+        return f'StaticData({self.as_dict()})'
+
+    def as_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class StaticCache:
+    """
+    Static and voyage data by MMSI, filled from type 5 and type 24 messages
+    and joined onto position reports:
+
+        cache = StaticCache()
+        for msg in stream:
+            static = cache.process(AISMessage(msg))
+
+    Entries are kept in least recently used order, so that eviction of the
+    least recently used one past max_size takes constant time. An entry whose
+    vessel has sent no static data for max_age seconds is dropped when next
+    looked up.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100_000,
+        max_age: float = 3600,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.clock = clock
+        self.entries: 'OrderedDict[int, StaticData]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, mmsi: int) -> bool:
+        return mmsi in self.entries
+
+    def process(self, msg: AISMessage) -> Optional[StaticData]:
+        """
+        Cache the static data of type 5 and 24 messages, and enrich position
+        reports. Returns the static data of the vessel, if known.
+        """
+        if msg.msg_type is None:
+            return None
+        msg_type = msg.msg_type.value
+        if msg_type in STATIC_TYPES:
+            return self.ingest(msg)
+        if msg_type in POSITION_TYPES:
+            return self.enrich(msg)
+        return None
+
+    def ingest(self, msg: AISMessage) -> StaticData:
+        """Update the entry of a vessel from a type 5 or 24 message."""
+        attrs = msg.attrs
+        get = attrs.get
+        mmsi = attrs['mmsi']
+        entries = self.entries
+
+        entry = entries.get(mmsi)
+        if entry is None:
+            entry = entries[mmsi] = StaticData(mmsi)
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+                self.evicted += 1
+        else:
+            entries.move_to_end(mmsi)
+
+        # Keys absent from the message, such as those of the other part of a
+        # type 24 message, keep their value
+        for key in TEXT_KEYS:
+            value = get(key)
+            if value is not None:
+                setattr(entry, key, intern(value))
+        for key in INT_KEYS:
+            value = get(key)
+            if value is not None:
+                setattr(entry, key, value)
+        # Cooked, or raw in decimetres
+        draught = get('draught_m', get('draught'))
+        if draught is not None:
+            entry.draught = draught
+        entry.updated = self.clock()
+        return entry
+
+    def get(self, mmsi: int) -> Optional[StaticData]:
+        entries = self.entries
+        entry = entries.get(mmsi)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.clock() - entry.updated > self.max_age:
+            del entries[mmsi]
+            self.expired += 1
+            self.misses += 1
+            return None
+        entries.move_to_end(mmsi)
+        self.hits += 1
+        return entry
+
+    def enrich(self, msg: AISMessage) -> Optional[StaticData]:
+        """Join the static data of its vessel onto a message, as msg.static."""
+        # Types without a decoder, such as 27 so far, have no MMSI decoded
+        mmsi = msg.attrs.get('mmsi')
+        if mmsi is None:
+            return None
+        msg.static = entry = self.get(mmsi)
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'expired': self.expired,
+        }
@@ -1,73 +1,416 @@
+import asyncio
+import mmap
+import os
 from socket import AF_INET, SOCK_STREAM, socket
-from typing import Iterable
-from .nmea_message import NMEAMessage, NMEAType
+from typing import AsyncIterable, Iterable, List, Optional, Union
 
+from .bits import ASCII6_TO_INT
+from .dedup import DuplicateFilter
+from .metrics import Metrics
+from .errors import InvalidLines
+from .nmea_message import POLICIES, STRICT, ChecksumError, NMEAMessage, NMEAType
+from .prefilter import HeaderFilter
+from .reassembly import Reassembler
 
-class Stream:
+
+class LineAssembler:
     """
-    NMEA0183 stream via socket. Refer to
-    https://en.wikipedia.org/wiki/NMEA_0183
+    The stages shared by all streams between a received line and a complete
+    message: parsing, reassembly and, optionally, duplicate suppression.
+
+    Lines that fail to parse raise a ValueError, after which iterating again
+    resumes with the next line, unless an error channel is given; then they
+    are only recorded there, and iteration goes on uninterrupted.
     """
 
-    BUF_SIZE = 4096
+    def __init__(
+        self,
+        reassembler: Optional[Reassembler] = None,
+        dedup: Optional[DuplicateFilter] = None,
+        metrics: Optional[Metrics] = None,
+        prefilter: Optional[HeaderFilter] = None,
+        policy: str = STRICT,
+        errors: Optional[InvalidLines] = None,
+    ):
+        """
+        :param policy: The validation policy of every sentence, one of
+                       nmea_message.POLICIES.
+        :param errors: If given, lines that fail to parse are recorded in it
+                       instead of raising.
+        :param dedup: If given, messages whose payload is a duplicate are dropped
+                      before their bits are decoded.
+        :param prefilter: If given, messages of types or MMSIs that it does not
+                          select are dropped, judged by their first payload
+                          characters only.
+        :param metrics: If given, each stage is timed and counted into it.
+                        Otherwise nothing is measured.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown validation policy "{policy}"')
+        self.reassembler = Reassembler() if reassembler is None else reassembler
+        self.policy = policy
+        self.errors = errors
+        self.dedup = dedup
+        self.metrics = metrics
+        self.prefilter = prefilter
 
-    def __init__(self, host: str = 'ais.exploratorium.edu', port: int = 80):
-        self.sock = socket(AF_INET, SOCK_STREAM)
-        self.sock.connect((host, port))
+        if metrics is not None:
+            # Swap in the measured variant, so that the unmeasured path does
+            # not even test for metrics
+            self._assemble = self._assemble_measured
+            metrics.watch('reassembly', self.reassembler.stats)
+            if dedup is not None:
+                metrics.watch('dedup', dedup.stats)
+            if prefilter is not None:
+                metrics.watch('prefilter', prefilter.stats)
+            if errors is not None:
+                metrics.watch('invalid', errors.stats)
+
+    def _assemble(self, line: Union[str, bytes]) -> Optional[NMEAMessage]:
+        """
+        Parse one line, and return it, or the message it completes, if any.
+        """
+        try:
+            msg = NMEAMessage(line, self.policy)
+        except Exception as e:
+            if self.errors is None:
+                raise ValueError(f'Failed to parse line "{line}"') from e
+            self.errors.add(line, e)
+            return None
+
+        if msg.nmea_type != NMEAType.ENCAPSULATED:
+            return msg  # Don't try to queue these
+
+        msg = self.reassembler.push(msg)
+        if msg is None:
+            return None
+        if self.prefilter is not None and not self.prefilter.matches(msg.payload):
+            return None
+        if self.dedup is not None and self.dedup.is_duplicate(msg.payload, msg.rx_time):
+            return None
+        return msg
+
+    def _assemble_measured(self, line: Union[str, bytes]) -> Optional[NMEAMessage]:
+        metrics = self.metrics
+        clock = metrics.clock
+        start = clock()
+        try:
+            msg = NMEAMessage(line, self.policy)
+        except Exception as e:
+            if isinstance(e, ChecksumError):
+                metrics.checksum_failures += 1
+            else:
+                metrics.parse_failures += 1
+            if self.errors is None:
+                raise ValueError(f'Failed to parse line "{line}"') from e
+            self.errors.add(line, e)
+            return None
+        parsed = clock()
+        metrics.stages['parse'].observe(parsed - start)
+
+        if msg.nmea_type != NMEAType.ENCAPSULATED:
+            return msg
+
+        msg = self.reassembler.push(msg)
+        if msg is not None and (
+            (self.prefilter is not None and not self.prefilter.matches(msg.payload)) or
+            (self.dedup is not None and self.dedup.is_duplicate(msg.payload, msg.rx_time))
+        ):
+            msg = None
+        metrics.stages['reassembly'].observe(clock() - parsed)
+
+        if msg is not None and msg.payload:
+            msg_type = ASCII6_TO_INT[ord(msg.payload[0]) & 0x7F]
+            if msg_type is not None:
+                metrics.messages[msg_type] += 1
+        return msg
+
+
+class BaseStream(LineAssembler):
+    """
+    Iterates over the NMEA0183 messages of a source of lines, which
+    subclasses provide through _recv_loop().
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.metrics is not None:
+            self._recv_loop = self._timed_recv_loop
+
+    def _timed_recv_loop(self) -> Iterable[Union[str, bytes]]:
+        return self.metrics.timed('recv', type(self)._recv_loop(self))
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.sock.close()
+        self.close()
+
+    def close(self):
+        pass
 
     def __iter__(self) -> Iterable[NMEAMessage]:
         return self._msg_loop()
 
     def _msg_loop(self) -> Iterable[NMEAMessage]:
-        queue = []
+        assemble = self._assemble
 
         for line in self._recv_loop():
-            try:
-                msg = NMEAMessage(line)
-            except Exception as e:
-                raise ValueError(f'Failed to parse line "{line}"') from e
+            msg = assemble(line)
+            if msg is not None:
+                yield msg
 
-            if msg.nmea_type != NMEAType.ENCAPSULATED:
-                yield(msg)  # Don't try to queue these
-                continue
-
-            if queue and not msg.follows(queue[-1]):
-                print('Invalid queue transition from/to:\n'
-                      f'   {queue[-1]}\n'
-                      f'   {msg}')
-                queue.clear()
-
-            if msg.is_single():
-                yield NMEAMessage.reduce([msg])
-            elif msg.is_multi():
-                queue.append(msg)
-                if msg.sentence_index == msg.sentence_count:
-                    yield NMEAMessage.reduce(queue)
-                    queue.clear()
+    def _recv_loop(self) -> Iterable[Union[str, bytes]]:
+        raise NotImplementedError()
+
+
+class LineBuffer:
+    """
+    Receive buffer of a stream socket, from which complete lines are split as
+    bytes. A partial line at the end is kept for the next receive.
+    """
+
+    def __init__(self, size: int):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.start = 0  # Received but not yet split: buf[start:end]
+        self.end = 0
+
+    def recv(self, sock: socket) -> Optional[List[bytes]]:
+        """
+        Receive once from sock, and return the lines completed by the data,
+        or None once the peer has closed the connection.
+        """
+        buf, start, end = self.buf, self.start, self.end
+        if end == len(buf):
+            if start:
+                # Move the partial line to the front to make room
+                buf[:end - start] = buf[start:end]
+                start, end = 0, end - start
             else:
-                raise ValueError(f'Invalid message queueable state for {msg}')
+                # A single line fills the whole buffer
+                self.view.release()
+                buf.extend(bytes(len(buf)))
+                self.view = memoryview(buf)
+        view = self.view
 
-    def _recv_loop(self) -> Iterable[str]:
-        partial = ''
-        while True:
-            body = self.sock.recv(self.BUF_SIZE).decode('ascii')
+        n = sock.recv_into(view[end:])
+        if not n:
+            self.start, self.end = start, end
+            return None
+        end += n
 
-            # Can't use splitlines() because it does not produce empty lines where it should.
-            # Need to call rstrip() because some lines are CRLF-terminated.
-            lines = tuple(l.rstrip() for l in body.split('\n'))
+        # Split every complete line received so far in one go, which is much
+        # faster than finding each line in turn
+        last = buf.rfind(b'\n', start, end)
+        if last < 0:
+            self.start, self.end = start, end
+            return []
+        # Need to call rstrip() because some lines are CRLF-terminated.
+        lines = [
+            line for line in (
+                line.rstrip() for line in view[start:last].tobytes().split(b'\n')
+            )
+            if line
+        ]
 
-            line = partial + lines[0]
-            if line:
-                yield line
+        start = last + 1
+        if start == end:
+            start = end = 0
+        self.start, self.end = start, end
+        return lines
+
+    def rest(self) -> bytes:
+        """The unterminated data at the end of the buffer."""
+        return self.view[self.start:self.end].tobytes().rstrip()
+
+
+class Stream(BaseStream):
+    """
+    NMEA0183 stream via socket. Refer to
+    https://en.wikipedia.org/wiki/NMEA_0183
+
+    Data is received into one preallocated buffer, from which the complete
+    lines are split as bytes for the parser, without decoding to str.
+    Iteration ends when the peer closes the connection.
+    """
+
+    BUF_SIZE = 65536
 
-            # yield from (line for line in lines[1:-1] if line)
-            for line in lines[1:-1]:
+    def __init__(
+        self,
+        host: str = 'ais.exploratorium.edu',
+        port: int = 80,
+        buf_size: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        :param buf_size: Receive buffer size in bytes. It grows if a single
+                         line does not fit.
+        """
+        super().__init__(**kwargs)
+        self.buf_size = self.BUF_SIZE if buf_size is None else buf_size
+        self.sock = socket(AF_INET, SOCK_STREAM)
+        self.sock.connect((host, port))
+        self._lines: Optional[Iterable[bytes]] = None
+
+    def close(self):
+        self.sock.close()
+
+    def _recv_loop(self) -> Iterable[bytes]:
+        # Iterating again, e.g. after a line failed to parse, resumes with the
+        # data already received
+        if self._lines is None:
+            self._lines = self._receive()
+        return self._lines
+
+    def _receive(self) -> Iterable[bytes]:
+        buffer = LineBuffer(self.buf_size)
+        recv = buffer.recv
+        sock = self.sock
+        while True:
+            lines = recv(sock)
+            if lines is None:
+                # The peer closed the connection; a final unterminated line
+                # is still a line
+                line = buffer.rest()
                 if line:
                     yield line
-            partial = lines[-1]
+                return
+            yield from lines
+
+
+class FileStream(BaseStream):
+    """
+    NMEA0183 stream from a file, such as an archived log. The file is memory
+    mapped, and lines are only copied out of the mapping once found.
+
+    Only the lines that start within [start, stop) are read, so a large log
+    can be processed in several bounded pieces. After each message, and after
+    each line that failed to parse, offset is the position from which a new
+    FileStream can resume reading without losing or repeating any message.
+    """
+
+    def __init__(self, path: str, start: int = 0, stop: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.stop = size if stop is None else min(stop, size)
+        self.start = start
+        self.offset = start
+        self._line_end = start
+        self._lines: Optional[Iterable[bytes]] = None
+
+        if size:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                self.map.madvise(mmap.MADV_SEQUENTIAL)
+        else:
+            self.map = None  # Empty files cannot be mapped
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def skip(self):
+        """Move offset past the line that was read last."""
+        self.offset = self._line_end
+
+    def _msg_loop(self) -> Iterable[NMEAMessage]:
+        assemble = self._assemble
+        groups = self.reassembler.groups
+
+        for line in self._recv_loop():
+            try:
+                msg = assemble(line)
+            except ValueError:
+                if not groups:
+                    self.offset = self._line_end
+                raise
+            if msg is not None:
+                # Resuming here loses nothing unless other groups are still
+                # in flight, which cannot be the case in a well-ordered log
+                if not groups:
+                    self.offset = self._line_end
+                yield msg
+
+    def _recv_loop(self) -> Iterable[bytes]:
+        # Iterating again, e.g. after a line failed to parse, resumes with the
+        # next line
+        if self._lines is None:
+            self._lines = self._read()
+        return self._lines
+
+    def _read(self) -> Iterable[bytes]:
+        m = self.map
+        if m is None:
+            return
+
+        pos = self.offset
+        if 0 < pos < self.stop and m[pos - 1] != 0x0A:
+            # Started mid-line; that line belongs to the previous range
+            pos = m.find(b'\n', pos) + 1 or self.stop
+
+        stop = self.stop
+        size = len(m)
+        while pos < stop:
+            end = m.find(b'\n', pos)
+            if end < 0:
+                end = size
+            self._line_end = min(end + 1, size)
+
+            # Trim the CR of CRLF-terminated lines before copying
+            line_end = end
+            if line_end > pos and m[line_end - 1] == 0x0D:
+                line_end -= 1
+            if line_end > pos:
+                yield m[pos:line_end]
+            pos = end + 1
+
+
+class AsyncStream(LineAssembler):
+    """
+    NMEA0183 stream via an asyncio connection, for use within an event loop:
+
+        async with AsyncStream() as s:
+            async for msg in s:
+                ...
+    """
+
+    def __init__(self, host: str = 'ais.exploratorium.edu', port: int = 80, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader = None
+        self.writer: asyncio.StreamWriter = None
+
+    async def __aenter__(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    def __aiter__(self) -> AsyncIterable[NMEAMessage]:
+        return self._msg_loop()
+
+    async def _msg_loop(self) -> AsyncIterable[NMEAMessage]:
+        assemble = self._assemble
+
+        async for line in self._recv_loop():
+            msg = assemble(line)
+            if msg is not None:
+                yield msg
+
+    async def _recv_loop(self) -> AsyncIterable[bytes]:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return  # The peer closed the connection
+
+            # Need to call rstrip() because some lines are CRLF-terminated.
+            line = line.rstrip()
+            if line:
+                yield line
@@ -1,4 +1,5 @@
-from .message import decode
+from .ais_message import AISMessage
+from .nmea_message import NMEAMessage
 
 MESSAGES = [
     "!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C",
@@ -12,7 +13,16 @@ MESSAGES = [
 ]
 
 
+def decode(raw: str) -> AISMessage:
+    nmea = NMEAMessage(raw)
+    if nmea.payload is None:
+        # The first of several sentences; decode what it holds on its own
+        nmea.payload = nmea.data
+    return AISMessage(nmea)
+
+
 def time():
+    """Quick timing of single messages. See pyais.bench for the full benchmarks."""
     import timeit
     import random
 
@@ -1,6 +1,8 @@
-from bitstring import BitArray
 from math import ceil
 
+from .bits import spread6
+from .schema import TEXT_TABLE
+
 
 def split_str(string, chunk_size=6):
     """
@@ -41,23 +43,17 @@ def ascii6_to_bin(data) -> str:
 
 def bin_to_ascii6(data):
     """
-    Encode binary data as 6 bit ASCII.
+    Encode binary data as 6 bit ASCII, up to the first '@'.
     :param data: binary string
     :return: ASCII String
     """
-    string = ""
-    for c in split_str(data):
-
-        c = int(c, 2)
-
-        if c < 0x20:
-            c += 0x40
-        if c == 64:
-            break
-
-        string += chr(c)
-
-    return string
+    n, extra = divmod(len(data), 6)
+    value = int(data, 2) if data else 0
+    chars = spread6(value >> extra, n)
+    if extra:
+        # A short last chunk is a character of its own
+        chars += bytes((value & ((1 << extra) - 1),))
+    return chars.translate(TEXT_TABLE).split(b'@', 1)[0].decode('ascii')
 
 
 def signed(bit_vector):
@@ -66,8 +62,11 @@ def signed(bit_vector):
     :param bit_vector: bit sequence
     :return: signed int
     """
-    b = BitArray(bin=bit_vector)
-    return b.int
+    value = to_int(bit_vector)
+    if bit_vector and bit_vector[0] == '1':
+        # Two's complement
+        value -= 1 << len(bit_vector)
+    return value
 
 
 def to_int(bit_string, base=2):
@@ -0,0 +1,222 @@
+from array import array
+from math import asin, cos, floor, isnan, nan, radians, sin, sqrt
+from time import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .ais_message import AISMessage
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.195
+
+Cell = Tuple[int, int]
+
+
+class Vessel(NamedTuple):
+    mmsi: int
+    lat_deg: float
+    long_deg: float
+    speed_knots: float
+    course_deg: float
+    heading_deg: float
+    status: int  # NavigationStatus value, or -1 if not reported
+    updated: float
+
+
+def _value(x, default=nan):
+    if x is None:
+        return default
+    return getattr(x, 'value', x)
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance."""
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
+    h = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * asin(min(1, sqrt(h)))
+
+
+class VesselTable:
+    """
+    The latest known position, speed, course and status of every vessel,
+    keyed by MMSI.
+
+    State is held in compact array columns, one row per vessel, rather than
+    a dict per vessel. A grid of cell_deg-sized cells indexes the rows by
+    position, so that area queries only visit the cells they overlap.
+    """
+
+    def __init__(self, cell_deg: float = 0.1, clock: Callable[[], float] = time):
+        self.cell_deg = cell_deg
+        self.clock = clock
+
+        self.mmsi = array('I')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.speed = array('f')
+        self.course = array('f')
+        self.heading = array('f')
+        self.status = array('b')
+        self.updated = array('d')
+        self._columns = (
+            self.mmsi, self.lat, self.lon, self.speed,
+            self.course, self.heading, self.status, self.updated,
+        )
+
+        self.rows: Dict[int, int] = {}
+        self.cells: List[Optional[Cell]] = []
+        self.grid: Dict[Cell, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, mmsi: int) -> bool:
+        return mmsi in self.rows
+
+    def __iter__(self) -> Iterator[Vessel]:
+        return (self._vessel(row) for row in range(len(self.mmsi)))
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return floor(lat / self.cell_deg), floor(lon / self.cell_deg)
+
+    def ingest(self, msg: AISMessage) -> bool:
+        """
+        Update the table from a position report (types 1-3, 18, 19). Returns
+        whether the message was one.
+        """
+        attrs = msg.attrs
+        if 'lat_deg' not in attrs or 'long_deg' not in attrs:
+            return False
+        # Aids to navigation (type 21) report a position but no movement
+        get = attrs.get
+        self.update(
+            attrs['mmsi'],
+            _value(attrs['lat_deg']),
+            _value(attrs['long_deg']),
+            _value(get('speed_knots')),
+            _value(get('course_deg')),
+            _value(get('heading_deg')),
+            _value(get('status'), -1),
+        )
+        return True
+
+    def update(
+        self,
+        mmsi: int,
+        lat: float,
+        lon: float,
+        speed: float = nan,
+        course: float = nan,
+        heading: float = nan,
+        status: int = -1,
+    ):
+        row = self.rows.get(mmsi)
+        if row is None:
+            row = self.rows[mmsi] = len(self.mmsi)
+            self.mmsi.append(mmsi)
+            for column in self._columns[1:]:
+                column.append(0)
+            self.cells.append(None)
+
+        self.lat[row] = lat
+        self.lon[row] = lon
+        self.speed[row] = speed
+        self.course[row] = course
+        self.heading[row] = heading
+        self.status[row] = status
+        self.updated[row] = self.clock()
+
+        cell = None if isnan(lat) or isnan(lon) else self._cell(lat, lon)
+        old = self.cells[row]
+        if cell != old:
+            if old is not None:
+                self._unindex(old, row)
+            if cell is not None:
+                self.grid.setdefault(cell, set()).add(row)
+            self.cells[row] = cell
+
+    def _unindex(self, cell: Cell, row: int):
+        rows = self.grid[cell]
+        rows.discard(row)
+        if not rows:
+            del self.grid[cell]
+
+    def remove(self, mmsi: int):
+        """Remove a vessel, moving the last row into its place."""
+        row = self.rows.pop(mmsi)
+        last = len(self.mmsi) - 1
+
+        if self.cells[row] is not None:
+            self._unindex(self.cells[row], row)
+        if row != last:
+            if self.cells[last] is not None:
+                self._unindex(self.cells[last], last)
+                self.grid.setdefault(self.cells[last], set()).add(row)
+            for column in self._columns:
+                column[row] = column[last]
+            self.cells[row] = self.cells[last]
+            self.rows[self.mmsi[row]] = row
+
+        for column in self._columns:
+            del column[last]
+        del self.cells[last]
+
+    def _vessel(self, row: int) -> Vessel:
+        return Vessel(*(column[row] for column in self._columns))
+
+    def get(self, mmsi: int) -> Optional[Vessel]:
+        row = self.rows.get(mmsi)
+        return None if row is None else self._vessel(row)
+
+    def _rows_in_box(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+    ) -> Iterator[int]:
+        if min_lon > max_lon:
+            # Crossing the antimeridian
+            yield from self._rows_in_box(min_lat, min_lon, max_lat, 180)
+            yield from self._rows_in_box(min_lat, -180, max_lat, max_lon)
+            return
+
+        lat, lon = self.lat, self.lon
+        lat0, lon0 = self._cell(min_lat, min_lon)
+        lat1, lon1 = self._cell(max_lat, max_lon)
+        grid = self.grid
+
+        if (lat1 - lat0 + 1) * (lon1 - lon0 + 1) > len(grid):
+            # The box covers more cells than are occupied
+            cells = (c for c in grid if lat0 <= c[0] <= lat1 and lon0 <= c[1] <= lon1)
+        else:
+            cells = ((i, j) for i in range(lat0, lat1 + 1) for j in range(lon0, lon1 + 1))
+
+        for cell in cells:
+            for row in grid.get(cell, ()):
+                if min_lat <= lat[row] <= max_lat and min_lon <= lon[row] <= max_lon:
+                    yield row
+
+    def in_box(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+    ) -> List[Vessel]:
+        """
+        Vessels within a bounding box. If min_lon > max_lon, the box crosses
+        the antimeridian.
+        """
+        return [self._vessel(row) for row in self._rows_in_box(min_lat, min_lon, max_lat, max_lon)]
+
+    def in_radius(self, lat: float, lon: float, radius_km: float) -> List[Vessel]:
+        """Vessels within a great-circle distance of a point."""
+        d_lat = radius_km / KM_PER_DEG_LAT
+        min_lat, max_lat = max(lat - d_lat, -90), min(lat + d_lat, 90)
+
+        cos_lat = min(cos(radians(min_lat)), cos(radians(max_lat)))
+        if cos_lat <= 0 or d_lat / cos_lat >= 180:
+            min_lon, max_lon = -180, 180
+        else:
+            d_lon = d_lat / cos_lat
+            min_lon = (lon - d_lon + 180) % 360 - 180
+            max_lon = (lon + d_lon + 180) % 360 - 180
+
+        lats, lons = self.lat, self.lon
+        return [
+            self._vessel(row)
+            for row in self._rows_in_box(min_lat, min_lon, max_lat, max_lon)
+            if distance_km(lat, lon, lats[row], lons[row]) <= radius_km
+        ]
@@ -0,0 +1,33 @@
+import numpy as np
+
+from pyais import batch
+from pyais.ais_message import AISMessage
+from pyais.nmea_message import NO_CHECKSUM, NMEAMessage
+
+PAYLOADS = [
+    '15M67FC000G?ufbE`FepT@3n00Sa',
+    '33=HuF5000rsnlvHbvGt5b;:0000',
+    '15NPOOPP00o?bIjE`UEv4?wF2HIU',
+]
+
+
+def test_matches_decoder(monkeypatch):
+    # Several chunks, the last one partial
+    monkeypatch.setattr(batch, 'CHUNK_ROWS', 2)
+    columns = batch.decode_position_reports(PAYLOADS * 3)
+    for i, payload in enumerate(PAYLOADS * 3):
+        nmea = NMEAMessage.reduce([NMEAMessage(f'!AIVDM,1,1,,A,{payload},0*00', NO_CHECKSUM)])
+        attrs = AISMessage(nmea).attrs
+        assert columns['mmsi'][i] == attrs['mmsi']
+        assert columns['status'][i] == attrs['status'].value
+        assert columns['long_deg'][i] == attrs['long_deg']
+        assert columns['lat_deg'][i] == attrs['lat_deg']
+        heading = np.nan if attrs['heading_deg'] is None else attrs['heading_deg']
+        np.testing.assert_equal(columns['heading_deg'][i], heading)
+
+
+def test_empty():
+    columns = batch.decode_position_reports([], ref_time=1171830306.92)
+    assert columns['mmsi'].shape == (0,)
+    assert columns['mmsi'].dtype == np.uint32
+    assert columns['time'].shape == (0,)
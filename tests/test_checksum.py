@@ -0,0 +1,35 @@
+import random
+from functools import reduce
+from operator import xor
+
+import pytest
+
+from pyais.nmea_message import NMEAMessage, checksum
+
+
+def xor_bytes(data: bytes) -> int:
+    # The per-character XOR that checksum() replaces
+    return reduce(xor, data, 0)
+
+
+@pytest.mark.parametrize('length', [0, 1, 2, 7, 8, 9, 63, 64, 65, 127, 128, 129, 200, 256, 1000, 4097])
+def test_matches_per_character_xor(length):
+    rng = random.Random(length)
+    for _ in range(20):
+        data = bytes(rng.getrandbits(8) for _ in range(length))
+        assert checksum(data) == xor_bytes(data)
+
+
+def test_buffer_types():
+    data = b'AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0'
+    assert checksum(data) == 0x5C
+    assert checksum(bytearray(data)) == 0x5C
+    assert checksum(memoryview(data)) == 0x5C
+    # A slice of a larger buffer, as the parser passes it
+    assert checksum(memoryview(b'!' + data + b'*5C')[1:-3]) == 0x5C
+
+
+def test_sentence_from_buffers():
+    line = b'!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C'
+    for raw in (line, bytearray(line), memoryview(line), line.decode()):
+        assert NMEAMessage(raw).data == '15M67FC000G?ufbE`FepT@3n00Sa'
@@ -0,0 +1,130 @@
+from datetime import datetime
+
+from bitarray import bitarray
+
+from pyais.ais.pos_class_a1 import NavigationStatus, TimeMode
+from pyais.ais_message import AISMessage
+from pyais.encode import sentences, encode_payload
+from pyais.nmea_message import NMEAMessage
+from pyais.reassembly import Reassembler
+
+# The receiver time of the gpsd samples, from which their timestamps are
+# reconstructed
+REF_TIME = 1171830306.92
+
+
+def decode(*lines: str, **kwargs) -> dict:
+    reassembler = Reassembler()
+    for line in lines:
+        msg = reassembler.push(NMEAMessage(line))
+    return AISMessage(msg, ref_time=REF_TIME, **kwargs).attrs
+
+
+def test_type_1():
+    attrs = decode('!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C')
+    assert attrs['mmsi'] == 366053209
+    assert attrs['status'] is NavigationStatus.RESTRICTED_MANOEUVERABILITY
+    assert attrs['turn_indicate_avail'] is True
+    assert attrs['turn_min_dps'] == 0.0
+    assert attrs['speed_knots'] == 0.0
+    assert attrs['accuracy_sub_10m'] is False
+    assert round(attrs['long_deg'], 6) == -122.341618
+    assert round(attrs['lat_deg'], 6) == 37.802118
+    assert attrs['course_deg'] == 219.3
+    assert attrs['heading_deg'] == 1
+    assert attrs['time_mode'] is TimeMode.EPFS
+    assert attrs['time'] == datetime(2007, 2, 18, 20, 24, 59)
+
+
+def test_type_1_not_available():
+    attrs = decode('!AIVDM,1,1,,B,15NPOOPP00o?bIjE`UEv4?wF2HIU,0*31')
+    assert attrs['mmsi'] == 367533950
+    assert attrs['turn_min_dps'] is None
+    assert attrs['course_deg'] is None
+    assert attrs['heading_deg'] is None
+
+
+def test_type_4():
+    attrs = decode('!AIVDM,1,1,,B,403OviQuMGCqWrRO9>E6fE700@GO,0*4E')
+    assert attrs['mmsi'] == 3669702
+    assert (attrs['year'], attrs['month'], attrs['day']) == (2007, 5, 14)
+    assert (attrs['hour'], attrs['minute'], attrs['second']) == (19, 57, 39)
+    assert attrs['accuracy_sub_10m'] is True
+    assert round(attrs['long_deg'], 6) == -76.352362
+    assert round(attrs['lat_deg'], 6) == 36.883767
+    assert attrs['epfd'] == 7
+
+
+def test_type_5():
+    attrs = decode(
+        '!AIVDM,2,1,1,A,55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp8,0*1C',
+        '!AIVDM,2,2,1,A,88888888880,2*25',
+    )
+    assert attrs['mmsi'] == 351759000
+    assert attrs['imo'] == 9134270
+    assert attrs['callsign'] == '3FOF8'
+    assert attrs['shipname'] == 'EVER DIADEM'
+    assert attrs['ship_type'] == 70
+    assert (attrs['to_bow'], attrs['to_stern'], attrs['to_port'], attrs['to_starboard']) == (225, 70, 1, 31)
+    assert attrs['epfd'] == 1
+    assert (attrs['eta_month'], attrs['eta_day'], attrs['eta_hour'], attrs['eta_minute']) == (5, 15, 14, 0)
+    assert attrs['draught_m'] == 12.2
+    assert attrs['destination'] == 'NEW YORK'
+    assert attrs['dte'] is False
+
+
+def test_type_18():
+    attrs = decode('!AIVDM,1,1,,A,B52KlJP00=l4be5ItJ6r3wVUWP06,0*7C')
+    assert attrs['mmsi'] == 338097258
+    assert attrs['speed_knots'] == 0.0
+    assert round(attrs['long_deg'], 6) == -122.270143
+    assert round(attrs['lat_deg'], 6) == 37.786295
+    assert attrs['course_deg'] == 297.6
+    assert attrs['heading_deg'] is None
+    assert attrs['cs_unit'] is True
+    assert attrs['raim_in_use'] is True
+
+
+def test_type_19():
+    attrs = decode('!AIVDM,1,1,,B,C5N3SRgPEnJGEBT>NhWAwwo862PaLELTBJ:V00000000S0D:R220,0*0B')
+    assert attrs['mmsi'] == 367059850
+    assert attrs['speed_knots'] == 8.7
+    assert round(attrs['long_deg'], 6) == -88.810392
+    assert round(attrs['lat_deg'], 6) == 29.543695
+    assert attrs['course_deg'] == 335.9
+    assert attrs['shipname'] == 'CAPT.J.RIMES'
+    assert attrs['ship_type'] == 70
+    assert (attrs['to_bow'], attrs['to_stern'], attrs['to_port'], attrs['to_starboard']) == (5, 21, 4, 4)
+    assert attrs['epfd'] == 1
+
+
+def test_type_21():
+    attrs = decode('!AIVDM,1,1,,A,E>jCfrv2`0c2h0W:0a2ah@@@@@@004WD>;2<H50hppN000,4*09')
+    assert attrs['mmsi'] == 992276203
+    assert attrs['aid_type'] == 28
+    assert attrs['name'] == 'EPAVE ANTARES'
+    assert round(attrs['long_deg'], 6) == 0.0315
+    assert round(attrs['lat_deg'], 6) == 49.536165
+    assert (attrs['to_bow'], attrs['to_stern'], attrs['to_port'], attrs['to_starboard']) == (5, 6, 7, 7)
+    assert attrs['time'] is None
+    assert attrs['name_ext'] == ''
+
+
+def test_type_24():
+    part_a = decode('!AIVDM,1,1,,A,H42O55i18tMET00000000000000,2*6D')
+    assert part_a == {'repeat': 0, 'mmsi': 271041815, 'part_num': 0, 'shipname': 'PROGUY'}
+
+    part_b = decode('!AIVDM,1,1,,A,H42O55lti4hhhilD3nink000?050,0*40')
+    assert part_b['mmsi'] == 271041815
+    assert part_b['part_num'] == 1
+    assert part_b['ship_type'] == 60
+    assert part_b['vendor_id'] == '1D0'
+    assert part_b['callsign'] == 'TC6163'
+    assert (part_b['to_bow'], part_b['to_stern'], part_b['to_port'], part_b['to_starboard']) == (0, 15, 0, 5)
+
+
+def test_fill_bits_are_not_data():
+    payload, fill = encode_payload(8, {'mmsi': 1, 'dac': 1, 'fid': 2, 'data': bitarray('10111')})
+    line, = sentences(payload, fill)
+    assert line.endswith(f',{fill}*' + line[-2:])
+    assert decode(line)['data'] == bitarray('10111')
@@ -0,0 +1,43 @@
+from pyais.dedup import DuplicateFilter
+from pyais.stream import FileStream
+
+LINES = (
+    '!AIVDM,2,1,1,A,55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp8,0*1C,r,{}',
+    '!AIVDM,2,2,1,A,88888888880,2*25,r,{}',
+)
+
+
+def test_message_time():
+    dedup = DuplicateFilter(window=10, clock=lambda: 0.0)
+    assert not dedup.is_duplicate('a', 100.0)
+    assert dedup.is_duplicate('a', 105.0)
+    assert not dedup.is_duplicate('a', 111.0)
+
+
+def test_replay_keeps_repeated_reports(tmp_path):
+    # A static report every six minutes, with a copy from a second station
+    # one second after the first
+    times = (1000.0, 1001.0, 1360.0, 1720.0)
+    path = tmp_path / 'replay.nmea'
+    path.write_text(''.join(line.format(time) + '\n' for time in times for line in LINES))
+
+    with FileStream(str(path), dedup=DuplicateFilter(window=10)) as s:
+        assert [msg.rx_time for msg in s] == [1000.0, 1360.0, 1720.0]
+
+
+def test_out_of_order_times():
+    dedup = DuplicateFilter(window=10)
+    # From a receiver whose times run ahead of the others
+    assert not dedup.is_duplicate('a', 1000.0)
+    assert not dedup.is_duplicate('b', 100.0)
+    # Expiry stops at 'a', which is still within the window
+    assert not dedup.is_duplicate('b', 1001.0)
+    assert dedup.is_duplicate('b', 1002.0)
+    assert dedup.is_duplicate('a', 995.0)
+
+
+def test_mixed_time_bases():
+    dedup = DuplicateFilter(window=10, clock=lambda: 50.0)
+    assert not dedup.is_duplicate('a', 1_700_000_000.0)
+    assert not dedup.is_duplicate('a')
+    assert dedup.is_duplicate('a', 55.0)
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+from bitarray import bitarray
+
+from pyais import ais
+from pyais.ais import static
+from pyais.ais_message import AISMessage
+from pyais.encode import Encoder, armor, sentences
+from pyais.nmea_message import NMEAMessage
+from pyais.reassembly import Reassembler
+from pyais.schema import text
+
+REF_TIME = 1171830306.92
+
+# (message type, field table, type 24 part number)
+TABLES = [(msg_type, fields, None) for msg_type, fields in ais.FIELDS.items()] + [
+    (24, static.FIELDS_A, 0),
+    (24, static.FIELDS_B, 1),
+]
+
+
+def decode(lines) -> dict:
+    reassembler = Reassembler()
+    for line in lines:
+        msg = reassembler.push(NMEAMessage(line))
+    return AISMessage(msg, ref_time=REF_TIME).attrs
+
+
+def random_payload(rng: random.Random, msg_type: int, fields, part_num=None) -> list:
+    """The sentences of a message of random field values."""
+    length = sum(field.width for field in fields if field.width is not None)
+    if fields[-1].width is None:
+        # Whole characters of text, or any number of bits
+        step = 6 if fields[-1].convert is text else 1
+        length += step * rng.randrange(20)
+    value = msg_type << (length - 6) | rng.getrandbits(length - 6)
+    if part_num is not None:
+        value = value & ~(3 << (length - 40)) | part_num << (length - 40)
+    return sentences(*armor(value, length), seq_id=0)
+
+
+@pytest.mark.parametrize('msg_type, fields, part_num', TABLES)
+def test_round_trip(msg_type, fields, part_num):
+    rng = random.Random(msg_type)
+    decoded = 0
+    for _ in range(200):
+        try:
+            attrs = decode(random_payload(rng, msg_type, fields, part_num))
+        except ValueError:
+            continue  # Random bits that are not a valid enum value
+        assert decode(Encoder().encode(msg_type, attrs)) == attrs
+        decoded += 1
+    assert decoded > 100
+
+
+def test_variable_text():
+    attrs = decode(Encoder().encode(21, {'mmsi': 992276203, 'name': 'EPAVE ANTARES', 'name_ext': 'EXTRA NAME'}))
+    assert attrs['name'] == 'EPAVE ANTARES'
+    assert attrs['name_ext'] == 'EXTRA NAME'
+
+
+def test_variable_data():
+    data = bitarray('1011100011101')
+    attrs = decode(Encoder().encode(8, {'mmsi': 1, 'dac': 1, 'fid': 2, 'data': data}))
+    assert attrs['data'] == data
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from pyais.errors import InvalidLines
+from pyais.metrics import Metrics
+from pyais.stream import FileStream
+
+LINES = (
+    '!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C',
+    '!AIVDM,1,1,,B,403OviQuMGCqWrRO9>E6fE700@GO,0*4E',
+    '!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5D',  # Bad checksum
+    'garbage',
+    '!AIVDM,1,1,,B',
+)
+
+
+class Clock:
+    """Advances by step every time it is read."""
+
+    def __init__(self, step: float):
+        self.step = step
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def metrics(tmp_path) -> Metrics:
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join(LINES) + '\n')
+
+    metrics = Metrics(clock=Clock(2e-6))
+    with FileStream(str(path), metrics=metrics, errors=InvalidLines()) as s:
+        for msg in s:
+            metrics.decode(msg)
+    return metrics
+
+
+def test_snapshot(metrics):
+    snap = metrics.snapshot()
+    assert snap['messages'] == {1: 1, 4: 1}
+    assert snap['checksum_failures'] == 1
+    assert snap['parse_failures'] == 2
+    assert snap['decode_failures'] == 0
+    assert snap['invalid'] == {'checksum': 1, 'start': 1, 'malformed': 1}
+    assert snap['reassembly'] == {'in_flight': 0, 'completed': 0, 'expired': 0, 'dropped': 0}
+
+    # Each stage takes one clock step per item
+    stages = snap['stages']
+    assert {name: stage['count'] for name, stage in stages.items()} == {
+        'recv': 5, 'parse': 2, 'reassembly': 2, 'decode': 2,
+    }
+    assert stages['recv']['buckets'][2.5e-6] == 5
+    assert sum(stages['recv']['buckets'].values()) == 5
+    assert stages['recv']['sum'] == pytest.approx(1e-5)
+
+
+def test_prometheus(metrics):
+    lines = metrics.prometheus().splitlines()
+    assert 'pyais_messages_total{type="1"} 1' in lines
+    assert 'pyais_messages_total{type="4"} 1' in lines
+    assert 'pyais_checksum_failures_total 1' in lines
+    assert 'pyais_parse_failures_total 2' in lines
+    assert 'pyais_dropped_fragments_total 0' in lines
+    # Buckets are cumulative
+    assert 'pyais_stage_seconds_bucket{stage="parse",le="1e-06"} 0' in lines
+    assert 'pyais_stage_seconds_bucket{stage="parse",le="2.5e-06"} 2' in lines
+    assert 'pyais_stage_seconds_bucket{stage="parse",le="+Inf"} 2' in lines
+    assert 'pyais_stage_seconds_count{stage="parse"} 2' in lines
+    assert 'pyais_invalid_checksum 1' in lines
+    assert 'pyais_reassembly_completed 0' in lines
+
+
+def test_write(metrics, tmp_path):
+    path = str(tmp_path / 'metrics')
+    metrics.write(path)
+    with open(path) as f:
+        assert f.read() == metrics.prometheus()
+
+    metrics.write(path, format='json')
+    with open(path) as f:
+        assert json.load(f)['checksum_failures'] == 1
+
+    with pytest.raises(ValueError):
+        metrics.write(path, format='xml')
@@ -0,0 +1,29 @@
+from pyais.metrics import Metrics
+from pyais.multiplex import MultiStream
+
+
+def test_senders_are_bounded():
+    with MultiStream(max_senders=2) as s:
+        first = s._sender_assembler('udp:10110', ('10.0.0.1', 5000))
+        s._sender_assembler('udp:10110', ('10.0.0.2', 5000))
+        # Used again, so the second sender is the least recently used one
+        assert s._sender_assembler('udp:10110', ('10.0.0.1', 5000)) is first
+        s._sender_assembler('udp:10110', ('10.0.0.3', 5000))
+
+        assert list(s.senders) == [('udp:10110', ('10.0.0.1', 5000)), ('udp:10110', ('10.0.0.3', 5000))]
+        assert s.evicted_senders == 1
+
+
+def test_evicted_senders_are_not_watched():
+    metrics = Metrics()
+    with MultiStream(metrics=metrics, max_senders=10) as s:
+        for i in range(1000):
+            assembler = s._sender_assembler('udp:10110', ('10.0.0.1', 5000 + i))
+            # The first sentence of a group, and a fragment without a start
+            assembler._assemble(b'!AIVDM,2,1,1,A,55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp8,0*1C')
+            assembler._assemble(b'!AIVDM,2,2,2,A,88888888880,2*26')
+
+        # The live senders, and the totals of those evicted
+        assert len(metrics._watched['reassembly']) == 11
+        assert s.evicted_senders == 990
+        assert metrics.snapshot()['reassembly'] == {'completed': 0, 'expired': 0, 'dropped': 1000, 'in_flight': 10}
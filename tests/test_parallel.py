@@ -0,0 +1,60 @@
+from operator import attrgetter
+
+import pytest
+
+from pyais.ais_message import AISMessage
+from pyais.encode import encode_payload, sentences
+from pyais.parallel import _decode_range, decode_file, split_ranges
+from pyais.stream import FileStream
+
+ATTRS = attrgetter('attrs')
+
+
+@pytest.fixture(scope='module')
+def log(tmp_path_factory) -> str:
+    """
+    Pairs of interleaved two-sentence messages, with single-sentence
+    messages and blank lines between them.
+    """
+    lines = []
+    for i in range(40):
+        a = sentences(*encode_payload(5, {'mmsi': 2*i + 1, 'shipname': 'A'}), seq_id=2*i % 10)
+        b = sentences(*encode_payload(5, {'mmsi': 2*i + 2, 'shipname': 'B'}), seq_id=(2*i + 1) % 10)
+        single = sentences(*encode_payload(1, {'mmsi': 1000 + i}))
+        lines += [a[0], '', b[0], a[1], ''] + single + [b[1]]
+    path = tmp_path_factory.mktemp('parallel') / 'log.nmea'
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def mmsis(attrs) -> list:
+    return sorted(a['mmsi'] for a in attrs)
+
+
+def test_single_pass(log):
+    with FileStream(log) as s:
+        attrs = [AISMessage(msg).attrs for msg in s]
+    assert mmsis(attrs) == list(range(1, 81)) + list(range(1000, 1040))
+
+
+@pytest.mark.parametrize('chunk_size', range(20, 600, 7))
+def test_ranges(log, chunk_size):
+    # In process, for a sweep of many chunk sizes
+    with FileStream(log) as s:
+        expected = [AISMessage(msg).attrs for msg in s]
+    results = []
+    for start, stop in split_ranges(log, chunk_size):
+        attrs, failures = _decode_range(log, start, stop, ATTRS)
+        assert not failures
+        results += attrs
+    assert mmsis(results) == mmsis(expected)
+
+
+@pytest.mark.parametrize('chunk_size', (64, 333, 1 << 20))
+def test_decode_file(log, chunk_size):
+    with FileStream(log) as s:
+        expected = [AISMessage(msg).attrs for msg in s]
+    ordered = list(decode_file(log, workers=2, chunk_size=chunk_size, func=ATTRS))
+    unordered = list(decode_file(log, workers=2, ordered=False, chunk_size=chunk_size, func=ATTRS))
+    assert mmsis(ordered) == mmsis(expected)
+    assert mmsis(unordered) == mmsis(ordered)
@@ -0,0 +1,45 @@
+from pyais.encode import encode_payload, sentences
+from pyais.prefilter import HeaderFilter, header
+from pyais.stream import FileStream
+
+TYPE_1 = '15M67FC000G?ufbE`FepT@3n00Sa'  # MMSI 366053209
+TYPE_3 = '33=HuF5000rsnlvHbvGt5b;:0000'  # MMSI 215367000
+TYPE_4 = '403OviQuMGCqWrRO9>E6fE700@GO'  # MMSI 3669702
+
+
+def test_header():
+    assert header(TYPE_1) == (1, 0, 366053209)
+    assert header(TYPE_4) == (4, 0, 3669702)
+
+
+def test_types():
+    f = HeaderFilter(types=(1, 3))
+    assert [f.matches(p) for p in (TYPE_1, TYPE_3, TYPE_4, '')] == [True, True, False, False]
+    assert f.stats() == {'passed': 2, 'rejected': 2}
+
+
+def test_mmsis():
+    f = HeaderFilter(mmsis=(3669702, 366053209))
+    assert [f.matches(p) for p in (TYPE_1, TYPE_3, TYPE_4)] == [True, False, True]
+    # Too short for an MMSI, or not valid armoring
+    assert not f.matches(TYPE_1[:6])
+    assert not f.matches('15M67F~000G')
+
+
+def test_types_and_mmsis():
+    f = HeaderFilter(types=(1, 3), mmsis=(3669702, 215367000))
+    assert [f.matches(p) for p in (TYPE_1, TYPE_3, TYPE_4)] == [False, True, False]
+
+
+def test_stream(tmp_path):
+    # A two-sentence type 5 message is judged once it is complete
+    lines = sentences(*encode_payload(5, {'mmsi': 3669702, 'shipname': 'A'}), seq_id=1)
+    lines += sentences(*encode_payload(5, {'mmsi': 215367000, 'shipname': 'B'}), seq_id=2)
+    lines += [sentences(p)[0] for p in (TYPE_1, TYPE_3, TYPE_4)]
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join(lines) + '\n')
+
+    f = HeaderFilter(types=(4, 5), mmsis=(3669702,))
+    with FileStream(str(path), prefilter=f) as s:
+        assert [header(msg.payload) for msg in s] == [(5, 0, 3669702), (4, 0, 3669702)]
+    assert f.stats() == {'passed': 2, 'rejected': 3}
@@ -0,0 +1,100 @@
+from pyais.encode import sentences
+from pyais.nmea_message import NMEAMessage
+from pyais.reassembly import Reassembler
+
+PAYLOAD = '55?MbV02;H;s<HtKR20EHE:0@T4@Dn2222222216L961O5Gf0NSQEp6ClRp888888888880'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def parts(seq_id: int, channel: str = 'A', talker: str = 'AI', payload: str = PAYLOAD) -> list:
+    """The sentences of a message, in three parts."""
+    return [NMEAMessage(line) for line in sentences(payload, 2, channel, seq_id, talker, max_chars=30)]
+
+
+def push_all(reassembler: Reassembler, messages) -> list:
+    return [msg for msg in map(reassembler.push, messages) if msg is not None]
+
+
+def test_single_sentence():
+    reassembler = Reassembler()
+    msg, = push_all(reassembler, [NMEAMessage('!AIVDM,1,1,,B,403OviQuMGCqWrRO9>E6fE700@GO,0*4E')])
+    assert msg.payload == '403OviQuMGCqWrRO9>E6fE700@GO'
+    assert reassembler.completed == 0
+
+
+def test_interleaved_groups():
+    reassembler = Reassembler()
+    # Keyed by talker, channel and sequence ID: each of these is its own group
+    groups = [parts(1), parts(2, payload=PAYLOAD[::-1]), parts(1, 'B'), parts(1, talker='BS')]
+    interleaved = [group[i] for i in range(3) for group in groups]
+
+    result = push_all(reassembler, interleaved)
+    assert [msg.payload for msg in result] == [PAYLOAD, PAYLOAD[::-1], PAYLOAD, PAYLOAD]
+    assert [(msg.talker, msg.channel, msg.seq_id) for msg in result] == [
+        ('AI', 'A', '1'), ('AI', 'A', '2'), ('AI', 'B', '1'), ('BS', 'A', '1'),
+    ]
+    assert result[0].fill_bits == 2
+    assert reassembler.stats() == {'in_flight': 0, 'completed': 4, 'expired': 0, 'dropped': 0}
+
+
+def test_superseded_group():
+    reassembler = Reassembler()
+    first, second = parts(1), parts(1, payload=PAYLOAD[::-1])
+    result = push_all(reassembler, first[:2] + second)
+    assert [msg.payload for msg in result] == [PAYLOAD[::-1]]
+    assert reassembler.dropped == 2
+    assert reassembler.completed == 1
+
+
+def test_fragments_out_of_order():
+    reassembler = Reassembler()
+    first, second, third = parts(1)
+    assert push_all(reassembler, [first, third, second]) == []
+    # The group and the fragment that broke it, then the orphan
+    assert reassembler.dropped == 3
+    assert not reassembler.groups
+
+
+def test_fragment_without_start():
+    reassembler = Reassembler()
+    assert push_all(reassembler, parts(1)[1:]) == []
+    assert reassembler.dropped == 2
+
+
+def test_max_groups():
+    reassembler = Reassembler(max_groups=2)
+    groups = [parts(seq_id) for seq_id in range(3)]
+    result = push_all(reassembler, [group[0] for group in groups])
+    assert result == []
+    assert list(reassembler.groups) == [('AI', 'A', '1'), ('AI', 'A', '2')]
+    assert reassembler.dropped == 1
+
+    # The oldest group was evicted, so its remaining fragments are orphans
+    result = push_all(reassembler, [msg for group in groups for msg in group[1:]])
+    assert len(result) == 2
+    assert reassembler.stats() == {'in_flight': 0, 'completed': 2, 'expired': 0, 'dropped': 3}
+
+
+def test_max_age():
+    clock = Clock()
+    reassembler = Reassembler(max_age=10, clock=clock)
+    old, new = parts(1), parts(2)
+
+    push_all(reassembler, old[:2])
+    clock.now = 5.0
+    push_all(reassembler, new[:1])
+    clock.now = 12.0
+    # Expired before it is pushed: the old group started 12 seconds ago
+    assert push_all(reassembler, old[2:]) == []
+    assert reassembler.expired == 2
+    assert reassembler.dropped == 1
+
+    assert [msg.payload for msg in push_all(reassembler, new[1:])] == [PAYLOAD]
+    assert reassembler.stats() == {'in_flight': 0, 'completed': 1, 'expired': 2, 'dropped': 1}
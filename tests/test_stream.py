@@ -0,0 +1,40 @@
+
+from pyais.stream import FileStream
+
+GOOD = '!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5C'
+BAD_CHECKSUM = '!AIVDM,1,1,,B,15M67FC000G?ufbE`FepT@3n00Sa,0*5D'
+TYPE_4 = '!AIVDM,1,1,,B,403OviQuMGCqWrRO9>E6fE700@GO,0*4E'
+
+
+def test_iterating_again_resumes_after_a_bad_line(tmp_path):
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join((GOOD, BAD_CHECKSUM, TYPE_4, BAD_CHECKSUM, GOOD)) + '\n')
+
+    payloads = []
+    failures = 0
+    with FileStream(str(path)) as s:
+        while True:
+            try:
+                payloads.extend(msg.payload for msg in s)
+                break
+            except ValueError:
+                failures += 1
+                assert failures <= 2, 'The same line failed again'
+                # A new stream resumes here, after the bad line
+                with open(path, 'rb') as f:
+                    f.seek(s.offset)
+                    assert f.readline().rstrip().decode() in (TYPE_4, GOOD)
+
+    assert failures == 2
+    assert payloads == [GOOD.split(',')[5], TYPE_4.split(',')[5], GOOD.split(',')[5]]
+
+
+def test_resume_from_offset(tmp_path):
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join((GOOD, TYPE_4, GOOD)) + '\n')
+
+    with FileStream(str(path)) as s:
+        next(iter(s))
+        offset = s.offset
+    with FileStream(str(path), offset) as s:
+        assert [msg.payload for msg in s] == [TYPE_4.split(',')[5], GOOD.split(',')[5]]
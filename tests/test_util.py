@@ -0,0 +1,13 @@
+from pyais.util import signed, to_int
+
+
+def test_signed():
+    assert signed('0111') == 7
+    assert signed('1111') == -1
+    assert signed('10000000') == -128
+
+
+def test_to_int():
+    assert to_int('101') == 5
+    assert to_int('') == 0
+    assert to_int('ff', 16) == 255
@@ -0,0 +1,90 @@
+from collections import Counter
+
+import pytest
+
+from pyais.errors import InvalidLines
+from pyais.nmea_message import (
+    BAD_CHANNEL, BAD_CHECKSUM, BAD_INDEX, BAD_SEQ_ID, BAD_START, LENIENT, MALFORMED,
+    NO_CHECKSUM, POLICIES, STRICT, NMEAMessage, ValidationError, checksum,
+)
+from pyais.parallel import decode_file
+from pyais.stream import FileStream
+
+PAYLOAD = '15M67FC000G?ufbE`FepT@3n00Sa'
+
+
+def sentence(body: str, start: str = '!') -> str:
+    return f'{start}{body}*{checksum(body.encode()):02X}'
+
+
+GOOD = sentence(f'AIVDM,1,1,,B,{PAYLOAD},0')
+BAD_SUM = GOOD[:-2] + '00'
+
+# (line, reason under each of STRICT, LENIENT and NO_CHECKSUM, None if valid)
+CASES = [
+    (GOOD, (None, None, None)),
+    (BAD_SUM, (BAD_CHECKSUM, BAD_CHECKSUM, None)),
+    (sentence(f'AIVDM,2,3,1,A,{PAYLOAD},0'), (BAD_INDEX, BAD_INDEX, BAD_INDEX)),
+    (sentence(f'AIVDM,2,0,1,A,{PAYLOAD},0'), (BAD_INDEX, BAD_INDEX, BAD_INDEX)),
+    # A count of none
+    (sentence(f'AIVDM,0,1,,A,{PAYLOAD},0'), (BAD_INDEX, BAD_INDEX, BAD_INDEX)),
+    (sentence(f'AIVDM,1,1,,C,{PAYLOAD},0'), (BAD_CHANNEL, None, None)),
+    (sentence(f'AIVDM,1,1,,,{PAYLOAD},0'), (BAD_CHANNEL, None, None)),
+    (sentence(f'AIVDM,2,1,,A,{PAYLOAD},0'), (BAD_SEQ_ID, None, None)),
+    (sentence(f'AIVDM,1,1,3,A,{PAYLOAD},0'), (BAD_SEQ_ID, None, None)),
+    (sentence(f'AIVDM,1,1,,B,{PAYLOAD},0', start='%'), (BAD_START, BAD_START, BAD_START)),
+    ('', (BAD_START, BAD_START, BAD_START)),
+    (sentence(f'AIVDM,x,1,,B,{PAYLOAD},0'), (MALFORMED, MALFORMED, MALFORMED)),
+    (sentence('AIVDM,1,1,,B'), (MALFORMED, MALFORMED, MALFORMED)),
+    (f'!AIVDM,1,1,,B,{PAYLOAD},0', (MALFORMED, MALFORMED, MALFORMED)),
+]
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+@pytest.mark.parametrize('line, reasons', CASES)
+def test_policies(line, reasons, policy):
+    reason = reasons[POLICIES.index(policy)]
+    if reason is None:
+        assert NMEAMessage(line, policy).data == PAYLOAD
+        return
+
+    with pytest.raises(ValueError) as info:
+        NMEAMessage(line, policy)
+    if reason != MALFORMED:
+        assert isinstance(info.value, ValidationError)
+    errors = InvalidLines(keep=1)
+    errors.add(line, info.value)
+    assert errors.counts == {reason: 1}
+    assert errors.lines[0].reason == reason
+    assert errors.lines[0].line == line
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        FileStream(__file__, policy='loose')
+
+
+def test_error_channel(tmp_path):
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join(line for line, _ in CASES if line) + '\n')
+
+    # The first sentence of a two-sentence message is valid but incomplete
+    for policy, messages in ((STRICT, 1), (LENIENT, 4), (NO_CHECKSUM, 5)):
+        errors = InvalidLines(keep=2)
+        with FileStream(str(path), policy=policy, errors=errors) as s:
+            assert len(list(s)) == messages
+        expected = Counter(reasons[POLICIES.index(policy)] for line, reasons in CASES if line)
+        del expected[None]
+        assert errors.counts == expected
+        assert len(errors.lines) == 2
+        assert errors.stats() == dict(expected)
+
+
+def test_decode_file_policy(tmp_path):
+    path = tmp_path / 'log.nmea'
+    path.write_text('\n'.join((GOOD, sentence(f'AIVDM,1,1,,C,{PAYLOAD},0'), BAD_SUM)) + '\n')
+
+    for policy, expected in ((STRICT, 1), (LENIENT, 2), (NO_CHECKSUM, 3)):
+        errors = InvalidLines()
+        assert len(list(decode_file(str(path), workers=1, errors=errors, policy=policy))) == expected
+        assert errors.total == 3 - expected